@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+NEXT = "next"
+PREV = "prev"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(record, direction):
+    """ Opaque cursor pointing just past `record` in `direction`. """
+    payload = {"d": direction, "t": record.date_updated.isoformat(), "id": record.pk}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """ `(direction, date_updated, id)` of a cursor from encode_cursor(); raises InvalidCursor. """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["d"] not in (NEXT, PREV):
+            raise ValueError(payload["d"])
+        return payload["d"], datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor("Invalid cursor.") from e
+
+
+def _after(record):
+    return Q(date_updated__lt=record.date_updated) | Q(date_updated=record.date_updated, id__lt=record.pk)
+
+
+def iter_keyset(queryset, chunk_size):
+    """
+    Every row of `queryset` in listing order, fetched `chunk_size` rows at a
+    time with the same seek as keyset_page(). Only one chunk is in memory at
+    once on every database, MySQL included, where `.iterator()` still reads
+    the whole result set into the driver.
+    """
+    queryset = queryset.order_by("-date_updated", "-id")
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk = list(queryset.filter(_after(chunk[-1]))[:chunk_size])
+
+
+def keyset_page(queryset, cursor=None, size=10):
+    """
+    One page of `queryset`, newest `date_updated` first with `id` breaking
+    ties, seeking from `cursor` instead of counting an OFFSET. Every page
+    costs one indexed range query however deep it is, and rows added while
+    a client scrolls never shift the pages it has not seen yet.
+
+    Returns `(rows, next_cursor, prev_cursor)`; a cursor is None where
+    there is nothing more in that direction.
+    """
+    direction, position = NEXT, None
+    if cursor:
+        direction, *position = decode_cursor(cursor)
+
+    if direction == NEXT:
+        queryset = queryset.order_by("-date_updated", "-id")
+        if position:
+            date_updated, pk = position
+            queryset = queryset.filter(Q(date_updated__lt=date_updated) | Q(date_updated=date_updated, id__lt=pk))
+    else:
+        date_updated, pk = position
+        queryset = queryset.order_by("date_updated", "id").filter(
+            Q(date_updated__gt=date_updated) | Q(date_updated=date_updated, id__gt=pk)
+        )
+
+    # One row past the page tells whether there is more without a COUNT
+    rows = list(queryset[:size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if direction == PREV:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+    has_next = has_more if direction == NEXT else True
+    has_prev = position is not None if direction == NEXT else has_more
+    return (
+        rows,
+        encode_cursor(rows[-1], NEXT) if has_next else None,
+        encode_cursor(rows[0], PREV) if has_prev else None,
+    )
@@ -82,3 +82,102 @@ TEMPLATES = [
         },
     },
 ]
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Spell-check results per normalized input, use FileBasedCache to share them between workers
+    'spell_check': {
+        'BACKEND': config('SPELL_CHECK_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('SPELL_CHECK_CACHE_LOCATION', default='spell-check'),
+        'TIMEOUT': config('SPELL_CHECK_CACHE_TTL', default=24 * 60 * 60, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SPELL_CHECK_CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    },
+}
+
+# Spell check
+# Threads rapidfuzz uses to score medicine names (-1 means one per CPU core)
+SPELL_CHECK_WORKERS = config('SPELL_CHECK_WORKERS', default=-1, cast=int)
+# Catalogs at least this large are narrowed down with the trigram index before scoring,
+# see `manage.py bench_spellcheck` for where the crossover sits on a given host
+SPELL_CHECK_NGRAM_MIN_CATALOG = config('SPELL_CHECK_NGRAM_MIN_CATALOG', default=10000, cast=int)
+# Candidates kept per extracted name by the trigram pre-filter
+SPELL_CHECK_NGRAM_SHORTLIST = config('SPELL_CHECK_NGRAM_SHORTLIST', default=300, cast=int)
+# Seconds a worker trusts its copy of the medicine catalog before re-reading the catalog version counter
+SPELL_CHECK_CATALOG_PROBE_SECONDS = config('SPELL_CHECK_CATALOG_PROBE_SECONDS', default=1, cast=float)
+# Share one memory-mapped catalog index between all gunicorn workers instead of one copy each
+SPELL_CHECK_SHARED_INDEX = config('SPELL_CHECK_SHARED_INDEX', default=False, cast=bool)
+SPELL_CHECK_SHARED_INDEX_PATH = config('SPELL_CHECK_SHARED_INDEX_PATH', default=str(BASE_DIR / 'var' / 'medicine_index.bin'))
+# Share of a match score taken from the phonetic key similarity (0 disables phonetic matching)
+SPELL_CHECK_PHONETIC_WEIGHT = config('SPELL_CHECK_PHONETIC_WEIGHT', default=0.5, cast=float)
+# Phonetic credit needs keys at least this similar and an edit score of at least this much
+SPELL_CHECK_PHONETIC_MIN_KEY_SCORE = config('SPELL_CHECK_PHONETIC_MIN_KEY_SCORE', default=90, cast=float)
+SPELL_CHECK_PHONETIC_MIN_EDIT_SCORE = config('SPELL_CHECK_PHONETIC_MIN_EDIT_SCORE', default=50, cast=float)
+
+# Prescription extraction
+# Threads each web process starts to drain queued extraction jobs (0 leaves them to run_extraction_workers)
+EXTRACTION_WORKERS = config('EXTRACTION_WORKERS', default=2, cast=int)
+# Seconds an idle extraction worker waits before polling the job table again
+EXTRACTION_JOB_POLL_SECONDS = config('EXTRACTION_JOB_POLL_SECONDS', default=2, cast=float)
+# Running jobs older than this many seconds are assumed orphaned and requeued
+EXTRACTION_JOB_TIMEOUT = config('EXTRACTION_JOB_TIMEOUT', default=300, cast=int)
+EXTRACTION_JOB_MAX_ATTEMPTS = config('EXTRACTION_JOB_MAX_ATTEMPTS', default=3, cast=int)
+# Extraction results are cached per BLAKE2 hash of the uploaded image bytes
+EXTRACTION_CACHE_ENABLED = config('EXTRACTION_CACHE_ENABLED', default=True, cast=bool)
+# Seconds a cached extraction stays valid (0 keeps entries forever)
+EXTRACTION_CACHE_TTL = config('EXTRACTION_CACHE_TTL', default=30 * 24 * 3600, cast=int)
+# Resize and re-encode scans before they are sent to the model
+EXTRACTION_PREPROCESS = config('EXTRACTION_PREPROCESS', default=True, cast=bool)
+# Longest side in pixels after downscaling (0 keeps the original resolution)
+EXTRACTION_IMAGE_MAX_EDGE = config('EXTRACTION_IMAGE_MAX_EDGE', default=2048, cast=int)
+EXTRACTION_IMAGE_GRAYSCALE = config('EXTRACTION_IMAGE_GRAYSCALE', default=False, cast=bool)
+EXTRACTION_IMAGE_AUTOCONTRAST = config('EXTRACTION_IMAGE_AUTOCONTRAST', default=False, cast=bool)
+# JPEG or WEBP
+EXTRACTION_IMAGE_FORMAT = config('EXTRACTION_IMAGE_FORMAT', default='JPEG')
+EXTRACTION_IMAGE_QUALITY = config('EXTRACTION_IMAGE_QUALITY', default=85, cast=int)
+# Generative model used for prescription extraction, the key only ever comes from the environment.
+# Left empty, every command and the stub backend still work; only a Gemini call fails
+GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
+GEMINI_MODEL_NAME = config('GEMINI_MODEL_NAME', default='gemini-2.0-flash')
+# grpc keeps one long-lived HTTP/2 channel per process; rest is the fallback behind proxies
+GEMINI_TRANSPORT = config('GEMINI_TRANSPORT', default='grpc')
+# "gemini", "stub" (offline fixture answers for load tests) or a dotted ExtractionBackend path
+EXTRACTION_BACKEND = config('EXTRACTION_BACKEND', default='gemini')
+EXTRACTION_STUB_FIXTURE = config('EXTRACTION_STUB_FIXTURE', default=str(BASE_DIR / 'image_processing' / 'fixtures' / 'stub_prescriptions.json'))
+EXTRACTION_STUB_LATENCY_MS = config('EXTRACTION_STUB_LATENCY_MS', default=1500, cast=float)
+EXTRACTION_STUB_JITTER_MS = config('EXTRACTION_STUB_JITTER_MS', default=500, cast=float)
+EXTRACTION_STUB_ERROR_RATE = config('EXTRACTION_STUB_ERROR_RATE', default=0, cast=float)
+# Host-wide cap on concurrent model calls, shared by all gunicorn workers through lock files
+EXTRACTION_MAX_CONCURRENCY = config('EXTRACTION_MAX_CONCURRENCY', default=4, cast=int)
+# Callers allowed to wait for a slot; beyond that uploads are rejected with 429 at once
+EXTRACTION_MAX_QUEUE = config('EXTRACTION_MAX_QUEUE', default=8, cast=int)
+# Seconds a queued caller waits for a slot before it gets a 503
+EXTRACTION_QUEUE_TIMEOUT = config('EXTRACTION_QUEUE_TIMEOUT', default=10, cast=float)
+EXTRACTION_LIMIT_DIR = config('EXTRACTION_LIMIT_DIR', default=str(BASE_DIR / 'var' / 'extraction_slots'))
+# Batch scan uploads
+EXTRACTION_BATCH_MAX_FILES = config('EXTRACTION_BATCH_MAX_FILES', default=500, cast=int)
+EXTRACTION_BATCH_CONCURRENCY = config('EXTRACTION_BATCH_CONCURRENCY', default=4, cast=int)
+# Zip members larger than this are skipped rather than decompressed
+EXTRACTION_BATCH_MAX_FILE_BYTES = config('EXTRACTION_BATCH_MAX_FILE_BYTES', default=25 * 1024 * 1024, cast=int)
+# Times a batch scan waits out a full extraction queue before it is reported as failed
+EXTRACTION_BATCH_BUSY_RETRIES = config('EXTRACTION_BATCH_BUSY_RETRIES', default=5, cast=int)
+DATA_UPLOAD_MAX_NUMBER_FILES = EXTRACTION_BATCH_MAX_FILES
+# Keep every uploaded scan and the provenance of each model run over it
+SCAN_STORAGE_ENABLED = config('SCAN_STORAGE_ENABLED', default=True, cast=bool)
+SCAN_STORAGE_ROOT = config('SCAN_STORAGE_ROOT', default=str(BASE_DIR / 'var' / 'scans'))
+# Seconds one model call may take, and all attempts of an extraction together
+EXTRACTION_CALL_TIMEOUT = config('EXTRACTION_CALL_TIMEOUT', default=30, cast=float)
+EXTRACTION_DEADLINE = config('EXTRACTION_DEADLINE', default=45, cast=float)
+# Retries of transient model errors, with full-jitter exponential backoff between them
+EXTRACTION_RETRIES = config('EXTRACTION_RETRIES', default=2, cast=int)
+EXTRACTION_RETRY_BASE_SECONDS = config('EXTRACTION_RETRY_BASE_SECONDS', default=0.5, cast=float)
+EXTRACTION_RETRY_MAX_SECONDS = config('EXTRACTION_RETRY_MAX_SECONDS', default=5, cast=float)
+# Consecutive failed model calls that open the circuit breaker, and how long it stays open
+EXTRACTION_BREAKER_FAILURES = config('EXTRACTION_BREAKER_FAILURES', default=5, cast=int)
+EXTRACTION_BREAKER_RESET_SECONDS = config('EXTRACTION_BREAKER_RESET_SECONDS', default=30, cast=float)
+# Rows read per query while streaming an all_data export
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=500, cast=int)
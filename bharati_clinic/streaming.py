@@ -0,0 +1,66 @@
+import csv
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from bharati_clinic.pagination import iter_keyset
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def ndjson_response(rows, status=200, filename=None):
+    """
+    Stream an iterable of JSON-serializable rows as newline-delimited JSON,
+    one row per line, so the client can start consuming before the last
+    row is produced.
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    lines = (encoder.encode(row) + "\n" for row in rows)
+    response = StreamingHttpResponse(lines, content_type="application/x-ndjson", status=status)
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class _Echo:
+    """ File-like object whose write() hands the line back, for csv.writer. """
+
+    def write(self, value):
+        return value
+
+
+def csv_response(rows, columns, filename=None):
+    """
+    Stream dict rows as CSV with a header of `columns`. Lists and dicts,
+    e.g. medications, are written as JSON inside their cell.
+    """
+    writer = csv.writer(_Echo())
+    encoder = JSONEncoder(ensure_ascii=False)
+
+    def cell(value):
+        if value is None:
+            return ""
+        return encoder.encode(value) if isinstance(value, (list, dict)) else value
+
+    def lines():
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([cell(row.get(column)) for column in columns])
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(queryset, serializer, export_format, name):
+    """
+    Stream every row of `queryset` as `export_format` (one of EXPORT_FORMATS).
+    Rows are read EXPORT_CHUNK_SIZE at a time and serialized one by one, so
+    an export of any size runs in constant memory.
+    """
+    rows = (serializer.to_representation(record) for record in iter_keyset(queryset, settings.EXPORT_CHUNK_SIZE))
+    if export_format == "csv":
+        return csv_response(rows, list(serializer.fields), filename=f"{name}.csv")
+    return ndjson_response(rows, filename=f"{name}.ndjson")
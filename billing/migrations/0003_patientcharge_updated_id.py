@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_initial'),
+        ('image_processing', '0006_prescriptiondailystat'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patientcharge',
+            index=models.Index(fields=['-date_updated', '-id'], name='patientcharge_updated_id'),
+        ),
+    ]
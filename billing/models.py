@@ -70,6 +70,10 @@ class PatientCharge(models.Model):
         db_table = "patient_charge"
         verbose_name = "Patient Charge"
         verbose_name_plural = "Patient Charges"
+        indexes = [
+            # Billing listings and exports, newest first, and their (date_updated, id) cursors
+            models.Index(fields=["-date_updated", "-id"], name="patientcharge_updated_id"),
+        ]
 
     def __str__(self):
         return f"PatientCharge for {self.patient.first_name}"
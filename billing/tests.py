@@ -1,3 +1,95 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bharati_clinic.pagination import InvalidCursor, decode_cursor, encode_cursor, iter_keyset, keyset_page
+from billing.models import PatientCharge
+from billing.views import BillingAPI
+from users.models import Patient, User
+
+
+class KeysetPaginationTests(TestCase):
+    """ Cursor pages over patient charges, newest first with the id breaking ties. """
+
+    @classmethod
+    def setUpTestData(cls):
+        patient = Patient.objects.create(first_name="ravi", last_name="patil")
+        PatientCharge.objects.bulk_create(PatientCharge(patient=patient) for _ in range(25))
+        # Three charges per timestamp, so page boundaries fall inside runs of equal date_updated
+        now = timezone.now()
+        for number, pk in enumerate(PatientCharge.objects.order_by("id").values_list("id", flat=True)):
+            PatientCharge.objects.filter(pk=pk).update(date_updated=now - timedelta(minutes=number // 3))
+        cls.expected = list(PatientCharge.objects.order_by("-date_updated", "-id").values_list("id", flat=True))
+        cls.user = User.objects.create(phone="9999999999", email="billing@example.com")
+
+    def pages(self, cursor=None, direction=1):
+        """ Every page from `cursor` on, following next (1) or prev (-1) cursors. """
+        pages = []
+        while True:
+            rows, next_cursor, prev_cursor = keyset_page(PatientCharge.objects.all(), cursor, size=10)
+            pages.append(([row.pk for row in rows], next_cursor, prev_cursor))
+            cursor = next_cursor if direction > 0 else prev_cursor
+            if not cursor:
+                return pages
+
+    def test_next_cursors_walk_every_row_once(self):
+        pages = self.pages()
+        self.assertEqual([len(ids) for ids, _, _ in pages], [10, 10, 5])
+        self.assertEqual([pk for ids, _, _ in pages for pk in ids], self.expected)
+        self.assertIsNone(pages[0][2])
+        self.assertIsNone(pages[-1][1])
+
+    def test_prev_cursors_walk_back_to_the_first_page(self):
+        forward = self.pages()
+        backward = self.pages(forward[-1][2], direction=-1)
+        self.assertEqual([ids for ids, _, _ in backward], [ids for ids, _, _ in forward[:-1]][::-1])
+        self.assertIsNone(backward[-1][2])
+
+    def test_rows_added_while_scrolling_do_not_shift_later_pages(self):
+        _, next_cursor, _ = keyset_page(PatientCharge.objects.all(), size=10)
+        PatientCharge.objects.create(patient=Patient.objects.get())
+        rows, _, _ = keyset_page(PatientCharge.objects.all(), next_cursor, size=10)
+        self.assertEqual([row.pk for row in rows], self.expected[10:20])
+
+    def test_iter_keyset_matches_listing_order(self):
+        self.assertEqual([row.pk for row in iter_keyset(PatientCharge.objects.all(), 7)], self.expected)
+
+    def test_invalid_cursors(self):
+        charge = PatientCharge.objects.first()
+        for cursor in ("garbage", encode_cursor(charge, "sideways"), "eyJkIjoibmV4dCJ9"):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                keyset_page(PatientCharge.objects.all(), cursor)
+
+    def test_billing_listing_rejects_invalid_cursor(self):
+        request = APIRequestFactory().get("/billing/", {"action": "getBilling", "pagination": "cursor", "cursor": "garbage"})
+        force_authenticate(request, self.user)
+        response = BillingAPI.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"message": "Invalid cursor."})
+
+    def test_billing_listing_pages(self):
+        request = APIRequestFactory().get(
+            "/billing/", {"action": "getBilling", "pagination": "cursor", "records_number": 10}
+        )
+        force_authenticate(request, self.user)
+        response = BillingAPI.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data["data"]], self.expected[:10])
+        self.assertIsNotNone(response.data["next_cursor"])
+        self.assertIsNone(response.data["prev_cursor"])
 
-# Create your tests here.
+    @skipUnless(connection.vendor in ("sqlite", "mysql"), "EXPLAIN output differs on this database")
+    def test_pages_use_the_listing_index(self):
+        _, next_cursor, _ = keyset_page(PatientCharge.objects.all(), size=10)
+        _, date_updated, pk = decode_cursor(next_cursor)
+        # The query keyset_page() runs for the second page
+        queryset = PatientCharge.objects.order_by("-date_updated", "-id").filter(
+            Q(date_updated__lt=date_updated) | Q(date_updated=date_updated, id__lt=pk)
+        )[:11]
+        plan = queryset.explain()
+        self.assertIn("patientcharge_updated_id", plan, f"patientcharge_updated_id not used by:\n{plan}")
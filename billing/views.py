@@ -8,6 +8,8 @@ from .models import PatientCharge, Patient, PrescriptionRecord, ClinicCharge
 from django.db.models import F, ExpressionWrapper, IntegerField, Case, When, Value, Sum, FloatField
 from .serializers import PatientChargeSerializer, ClinicChargeSerializer
 from .filters import PatientChargeFilter
+from bharati_clinic.pagination import keyset_page, InvalidCursor
+from bharati_clinic.streaming import export_response, EXPORT_FORMATS
 from datetime import datetime, timedelta
 from django.http import HttpResponse
 
@@ -38,7 +40,10 @@ class BillingAPI(APIView):
                 action_status = action_mapper.get(action)
                 print(action_status)
                 if action_status:
-                    action_status(request)
+                    # Actions that answer with their own response, e.g. a streamed export
+                    response = action_status(request)
+                    if response is not None:
+                        return response
                 else:
                     return Response({"message": "Choose Wrong Option!", "data": None}, status.HTTP_400_BAD_REQUEST)
                 return Response(self.ctx, self.status)
@@ -92,6 +97,14 @@ class BillingAPI(APIView):
                             output_field=FloatField()
                         )
     )
+                if self.data.get("pagination") == "cursor":
+                    self.cursor_page(filtered_queryset, records_number)
+                    return
+
+                export_format = self.data.get("export")
+                if all_data and export_format in EXPORT_FORMATS:
+                    return export_response(filtered_queryset, PatientChargeSerializer(), export_format, "patient_charges")
+
                 total_count = filtered_queryset.count()
 
                 # Calculate grand total cost
@@ -123,6 +136,25 @@ class BillingAPI(APIView):
                 self.ctx = {"message": "Error in fetching data!"}
                 self.status = status.HTTP_404_NOT_FOUND
 
+    def cursor_page(self, queryset, records_number):
+        """ Keyset paginated listing; the totals are only computed with `with_count=true`. """
+        try:
+            rows, next_cursor, prev_cursor = keyset_page(queryset, self.data.get("cursor"), records_number)
+        except InvalidCursor as e:
+            self.ctx = {"message": str(e)}
+            self.status = status.HTTP_400_BAD_REQUEST
+            return
+        self.ctx = {
+            "message": "Successfully fetched Patient Charges!",
+            "data": PatientChargeSerializer(rows, many=True).data,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+        if str(self.data.get("with_count", "")).lower() in ("1", "true"):
+            self.ctx["total_count"] = queryset.count()
+            self.ctx["grand_total_cost"] = queryset.aggregate(total=Sum("total_cost"))["total"] or 0
+        self.status = status.HTTP_200_OK
+
     def post(self, request):
         self.data = request.data
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from image_processing.models import PrescriptionRecord
+from image_processing.models import PrescriptionRecord, ExtractionJob, ExtractionCache, PrescriptionScan, ScanExtraction, \
+    PrescriptionDailyStat
 
 
 class PrescriptionRecordAdmin(admin.ModelAdmin):
@@ -7,3 +8,39 @@ class PrescriptionRecordAdmin(admin.ModelAdmin):
 
 
 admin.site.register(PrescriptionRecord, PrescriptionRecordAdmin)
+
+
+class ExtractionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'attempts', 'date_created', 'date_finished')
+    exclude = ('image',)
+
+
+admin.site.register(ExtractionJob, ExtractionJobAdmin)
+
+
+class ExtractionCacheAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'hits', 'date_updated')
+
+
+admin.site.register(ExtractionCache, ExtractionCacheAdmin)
+
+
+class PrescriptionScanAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'path', 'size', 'date_created')
+
+
+admin.site.register(PrescriptionScan, PrescriptionScanAdmin)
+
+
+class ScanExtractionAdmin(admin.ModelAdmin):
+    list_display = ('scan', 'model_name', 'prompt_version', 'latency_ms', 'original_size', 'processed_size', 'date_created')
+
+
+admin.site.register(ScanExtraction, ScanExtractionAdmin)
+
+
+class PrescriptionDailyStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'gender', 'type', 'count', 'date_updated')
+
+
+admin.site.register(PrescriptionDailyStat, PrescriptionDailyStatAdmin)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ImageProcessingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'image_processing'
+
+    def ready(self):
+        from . import signals  # noqa
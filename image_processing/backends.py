@@ -0,0 +1,117 @@
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from google.api_core import exceptions as google_exceptions
+
+from image_processing.client import extraction_client
+
+
+class ExtractionBackend(ABC):
+    """
+    Turns a prompt and a preprocessed scan into the model's raw text answer.
+    Parsing the JSON out of that text stays in image_processing.extraction,
+    so every backend goes through the same checks. A subclass that does not
+    implement generate() fails when it is constructed.
+    """
+
+    name = ""
+    # Failures worth retrying, and the subset that means the call ran out of time
+    transient_errors = (TimeoutError, ConnectionError)
+    timeout_errors = (TimeoutError,)
+
+    @property
+    def model_name(self):
+        return self.name
+
+    @abstractmethod
+    def generate(self, prompt, image, timeout):
+        """ The answer text; must give up with an exception after `timeout` seconds. """
+
+    def health(self):
+        return {"healthy": True, "model": self.model_name, "latency_ms": 0.0, "error": ""}
+
+
+class GeminiBackend(ExtractionBackend):
+    name = "gemini"
+    transient_errors = ExtractionBackend.transient_errors + (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.Aborted,
+    )
+    timeout_errors = ExtractionBackend.timeout_errors + (google_exceptions.DeadlineExceeded, google_exceptions.GatewayTimeout)
+
+    @property
+    def model_name(self):
+        return extraction_client.model_name
+
+    def generate(self, prompt, image, timeout):
+        # Sent as an encoded blob, a PIL image would be re-encoded as lossless WebP by the SDK
+        organ = {"mime_type": image.mime_type, "data": image.data}
+        return extraction_client.generate_content([prompt, organ], request_options={"timeout": timeout}).text
+
+    def health(self):
+        return extraction_client.health()
+
+
+class StubBackend(ExtractionBackend):
+    """
+    Offline stand-in for load tests and benchmarks. Answers with a prescription
+    from EXTRACTION_STUB_FIXTURE, chosen by the scan's hash so the same image
+    always gets the same answer, after sleeping EXTRACTION_STUB_LATENCY_MS
+    plus up to EXTRACTION_STUB_JITTER_MS (also derived from the hash).
+    EXTRACTION_STUB_ERROR_RATE makes that share of calls fail as transient
+    connection errors.
+    """
+
+    name = "stub"
+
+    def __init__(self):
+        with open(settings.EXTRACTION_STUB_FIXTURE) as fixture:
+            prescriptions = json.load(fixture)
+        self.prescriptions = prescriptions if isinstance(prescriptions, list) else [prescriptions]
+
+    def generate(self, prompt, image, timeout):
+        seed = int.from_bytes(hashlib.blake2b(image.data, digest_size=8).digest(), "big")
+        jitter = random.Random(seed).uniform(0, settings.EXTRACTION_STUB_JITTER_MS)
+        delay = (settings.EXTRACTION_STUB_LATENCY_MS + jitter) / 1000
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Stub backend took longer than {timeout:g}s")
+        time.sleep(delay)
+        # Random on purpose, to load test retries and the circuit breaker
+        if random.random() < settings.EXTRACTION_STUB_ERROR_RATE:
+            raise ConnectionError("Stub backend failure")
+        # Fenced like the real model's answers, so the same parsing path is exercised
+        return "```json\n" + json.dumps(self.prescriptions[seed % len(self.prescriptions)]) + "\n```"
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    StubBackend.name: StubBackend,
+}
+
+_lock = threading.Lock()
+_backends = {}
+
+
+def get_backend(name=None):
+    """
+    The process-wide backend for EXTRACTION_BACKEND, either a name from
+    BACKENDS or the dotted path of an ExtractionBackend subclass.
+    """
+    name = name or settings.EXTRACTION_BACKEND
+    with _lock:
+        if name not in _backends:
+            backend_class = BACKENDS[name] if name in BACKENDS else import_string(name)
+            _backends[name] = backend_class()
+        return _backends[name]
@@ -0,0 +1,190 @@
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from image_processing.exceptions import ExtractionError, ExtractionUnavailable
+from image_processing.extraction_cache import run_extraction
+from image_processing.models import PrescriptionRecord
+from image_processing.patients import existing_patient_for, create_patient_from_name
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp")
+ZIP_SUFFIXES = (".zip",)
+# Types postPrescriptionRecord accepts: old and new patients
+RECORD_TYPES = ("O", "N")
+
+
+def iter_scans(uploads, archives):
+    """
+    Yield `(name, read)` for every scan in the uploaded files, where `read()`
+    returns the image bytes. Zip archives are opened in place and each member
+    is only decompressed when a worker reads it, so at most one image per
+    worker is held in memory. Anything that is not a scan is yielded with
+    `read=None`.
+    """
+    for upload in uploads:
+        if not upload.name.lower().endswith(IMAGE_SUFFIXES):
+            yield upload.name, None
+            continue
+        yield upload.name, upload.read
+
+    for archive in archives:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if not info.filename.lower().endswith(IMAGE_SUFFIXES) or info.file_size > settings.EXTRACTION_BATCH_MAX_FILE_BYTES:
+                yield info.filename, None
+                continue
+            yield info.filename, lambda archive=archive, info=info: archive.read(info)
+
+
+def open_archives(uploads):
+    """ Split uploads into plain files and opened zip archives. Raises zipfile.BadZipFile. """
+    files, archives = [], []
+    for upload in uploads:
+        if upload.name.lower().endswith(ZIP_SUFFIXES):
+            archives.append(zipfile.ZipFile(upload))
+        else:
+            files.append(upload)
+    return files, archives
+
+
+def _extract(read, force, user):
+    """ Worker side of a batch: read one scan and extract it, waiting out a busy host. """
+    try:
+        data = read()
+        for _ in range(settings.EXTRACTION_BATCH_BUSY_RETRIES):
+            try:
+                return run_extraction(data, force=force, user=user)
+            except ExtractionUnavailable as e:
+                time.sleep(e.retry_after)
+        return run_extraction(data, force=force, user=user)
+    finally:
+        connection.close()
+
+
+class NeedsReview(Exception):
+    """ The scan was extracted, but attaching it to a patient needs a person. """
+
+
+def _patient_for(extracted, user):
+    """
+    A new patient for an extracted prescription, under the same rules as
+    postPrescriptionRecord for a record without a patient id. A scan is
+    never attached to an existing patient by name alone: common names would
+    merge different people, so a clash is left for review instead.
+    """
+    patient_name = str(extracted.get("patient_name") or "").lower()
+    if not patient_name.split():
+        raise ValidationError("Patient name is missing.")
+    existing_patient = existing_patient_for(patient_name)
+    if existing_patient:
+        raise NeedsReview(
+            f"A patient named {patient_name!r} already exists (id {existing_patient.pk}), "
+            "attach this prescription to the right patient manually."
+        )
+    return create_patient_from_name(patient_name, place=extracted.get("place", ""), user_created=user)
+
+
+def _record_for(extracted, user):
+    record = PrescriptionRecord(
+        patient_name=str(extracted.get("patient_name") or "").lower(),
+        # An unreadable date stays empty, like in postPrescriptionRecord, instead of landing on today
+        prescription_date=extracted.get("prescription_date") or None,
+        medications=extracted.get("medications") or [],
+        complaints=extracted.get("complaints") or [],
+        gender=extracted.get("gender", ""),
+        age=extracted.get("age", ""),
+        weight=extracted.get("weight", ""),
+        bp=extracted.get("bp", ""),
+        place=extracted.get("place", ""),
+        follow_up_date=extracted.get("follow_up_date") or None,
+        pulse=extracted.get("pulse", ""),
+        lab_test=extracted.get("Lab_test") or [],
+        type=extracted.get("type", ""),
+    )
+    # Validated before the patient lookup, so a bad scan never leaves an orphan patient behind.
+    # Empty values are fine, postPrescriptionRecord saves them too.
+    try:
+        record.clean_fields(exclude=["patient"])
+    except ValidationError as e:
+        problems = [
+            f"{field}: {message}"
+            for field, errors in e.error_dict.items()
+            for error in errors if error.code != "blank"
+            for message in error.messages
+        ]
+        if problems:
+            raise ValidationError(problems)
+    if record.type not in RECORD_TYPES:
+        raise NeedsReview(f"Invalid type {record.type!r}, it must be 'O' or 'N'.")
+    record.patient = _patient_for(extracted, user)
+    return record
+
+
+def run_batch(scans, user, create_records=False, force=False):
+    """
+    Extract every scan from `iter_scans()` on EXTRACTION_BATCH_CONCURRENCY
+    threads and yield one result row per file as soon as it completes, then
+    a final summary row.
+
+    With `create_records`, each successful extraction becomes a
+    PrescriptionRecord for a newly created patient, both written in one
+    transaction before the row is yielded, so a client that disconnects
+    never leaves a patient without its record. A scan whose patient name
+    clashes with an existing patient, including one created earlier in the
+    same batch, or whose type is not "O" or "N" gets status "review" with
+    its data and no record. Patients are resolved on the calling thread
+    only.
+    """
+    counts = {"files": 0, "done": 0, "failed": 0, "skipped": 0, "review": 0, "records_created": 0}
+
+    pool = ThreadPoolExecutor(settings.EXTRACTION_BATCH_CONCURRENCY, thread_name_prefix="batch-extraction")
+    try:
+        futures = {}
+        for name, read in scans:
+            counts["files"] += 1
+            if counts["files"] > settings.EXTRACTION_BATCH_MAX_FILES:
+                counts["skipped"] += 1
+                yield {"file": name, "status": "skipped", "error": "Batch file limit reached"}
+            elif read is None:
+                counts["skipped"] += 1
+                yield {"file": name, "status": "skipped", "error": "Not a supported image file"}
+            else:
+                futures[pool.submit(_extract, read, force, user)] = name
+
+        for future in as_completed(futures):
+            row = {"file": futures[future]}
+            try:
+                run = future.result()
+                row["data"] = run.data
+                row["extraction_id"] = run.extraction_id
+            except ExtractionError as e:
+                row.update(status="failed", error=str(e))
+            except Exception as e:
+                row.update(status="failed", error=f"Something went wrong: {str(e)}")
+            else:
+                row["status"] = "done"
+                if create_records:
+                    try:
+                        with transaction.atomic():
+                            record = _record_for(row["data"], user)
+                            record.extraction_id = run.extraction_id
+                            record.save()
+                        counts["records_created"] += 1
+                        row["record"] = record.pk
+                        row["patient"] = record.patient_id
+                    except ValidationError as e:
+                        row.update(status="failed", error=f"Record not created: {'; '.join(e.messages)}")
+                    except NeedsReview as e:
+                        row.update(status="review", error=f"Record not created: {str(e)}")
+            counts[row["status"]] += 1
+            yield row
+    finally:
+        # A client that disconnects mid-batch stops the scans that have not started yet
+        pool.shutdown(cancel_futures=True)
+
+    yield {"summary": counts}
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class ExtractionClient:
+    """
+    One configured GenerativeModel per process, built on first use.
+
+    `genai.configure()` drops the SDK's cached service clients, so calling it
+    on every request opened a fresh channel (DNS, TLS, HTTP/2 setup) each
+    time. Here it runs once per process and later calls reuse the warm
+    channel. The pid check rebuilds the client in a forked child, where the
+    parent's channel must not be shared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._pid = None
+
+    @property
+    def model_name(self):
+        return settings.GEMINI_MODEL_NAME
+
+    def model(self):
+        with self._lock:
+            if self._model is None or self._pid != os.getpid():
+                if not settings.GEMINI_API_KEY:
+                    raise ImproperlyConfigured("GEMINI_API_KEY is not set, the Gemini extraction backend needs it")
+                genai.configure(api_key=settings.GEMINI_API_KEY, transport=settings.GEMINI_TRANSPORT)
+                self._model = genai.GenerativeModel(self.model_name)
+                self._pid = os.getpid()
+            return self._model
+
+    def generate_content(self, contents, **kwargs):
+        return self.model().generate_content(contents, **kwargs)
+
+    def health(self):
+        """ Round trip a model metadata lookup over the shared channel. """
+        start = time.perf_counter()
+        try:
+            self.model()
+            genai.get_model(f"models/{self.model_name}", request_options={"timeout": settings.EXTRACTION_CALL_TIMEOUT})
+            healthy, error = True, ""
+        except Exception as e:
+            healthy, error = False, str(e)
+        return {
+            "healthy": healthy,
+            "model": self.model_name,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "error": error,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._model = None
+
+
+extraction_client = ExtractionClient()
@@ -0,0 +1,47 @@
+class ExtractionError(Exception):
+    """ The model call itself failed. """
+
+    http_status = 500
+
+
+class ExtractionParseError(ExtractionError):
+    """ The model answered, but with no JSON object at all. `raw_text` keeps the paid-for answer. """
+
+    def __init__(self, message, raw_text="", model_name="", latency_ms=0, original_size=0, processed_size=0):
+        super().__init__(message)
+        self.raw_text = raw_text
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.original_size = original_size
+        self.processed_size = processed_size
+
+
+class ExtractionTimeout(ExtractionError):
+    """ The model did not answer within the extraction deadline. """
+
+    http_status = 504
+
+
+class ExtractionUnavailable(ExtractionError):
+    """ The model is failing and the circuit breaker is open; try again after `retry_after` seconds. """
+
+    http_status = 503
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ExtractionBusy(ExtractionUnavailable):
+    """
+    No model slot was free. `queue_full` tells an immediate rejection (the
+    wait queue was full) from a wait that timed out.
+    """
+
+    def __init__(self, message, retry_after, queue_full):
+        super().__init__(message, retry_after)
+        self.queue_full = queue_full
+
+    @property
+    def http_status(self):
+        return 429 if self.queue_full else 503
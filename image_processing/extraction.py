@@ -0,0 +1,104 @@
+import hashlib
+from collections import namedtuple
+
+from image_processing.backends import get_backend
+from image_processing.exceptions import ExtractionError, ExtractionParseError
+from image_processing.parsing import parse_model_output
+from image_processing.preprocessing import preprocess_image
+from image_processing.resilience import call_backend
+
+
+PRESCRIPTION_PROMPT = '''Analyze the provided prescription image and extract the following information into a strict JSON format. Use an empty string "" for any field where information is not present. All text output should be in English.
+
+**Extraction Rules:**
+
+1.  **Patient Details:** Extract Name, Age, Gender.
+2.  **Vitals & Info:**
+    *   `weight`: Value from the 'Weight' field.
+    *   `bp`: Value written below the 'B/P' text.
+    *   `place`: Text from the 'Address' field.
+    *   `type`: "O" (Old) or "N" (New) based on the character ('O' or 'N') written **below** the 'Type' label.  *(Modification made here)*
+    *   `pulse`: Value from the 'Pulse' field.
+3.  **Dates:**
+    *   `prescription_date`: Extract the date (top right), format as YYYY-MM-DD.
+    *   `follow_up_date`: Extract date if mentioned at the very bottom, format as YYYY-MM-DD.
+4.  **Clinical Info:**
+    *   `complaints`: List any complaints mentioned.
+    *   `Lab_test`: List any lab tests requested (format: [{"Test1": "Result"},...]).
+5.  **Medications:**
+    *   Extract each medication name (exclude prefixes like "Tab.").
+    *   Determine dosage timing (morning, afternoon, night) based on the pattern following the name (e.g., '1-0-1', '1 - x - 1', '0 1 1/2').
+    *   **Timing Logic:** A digit (like 1, 2, 1/2) means `true` for that time slot (morning, afternoon, night respectively). A symbol (like x, 0, >) or absence means `false`. Handle variations in separators (-, spaces) and potential cursive script.
+    *   Format as shown in the JSON structure below.
+
+**Required JSON Output Format:**
+
+{
+    "patient_name": "Extracted Name",
+    "gender":"F(female) or M(male)",
+    "age":"extracted Age",
+    "weight":"Extracted Weight",
+    "bp":"Extracted B/P",
+    "place":"Extracted Address",
+    "type":"O(Old) or N(New)",
+    "pulse":"Extracted Pulse",
+    "Lab_test":[{"Test1":"Result"},...],
+    "prescription_date": "YYYY-MM-DD",
+    "follow_up_date":"YYYY-MM-DD",
+    "complaints":["Fever","cold",...],
+    "medications": [
+        {
+            "name": "Medication Name",
+            "timing": {
+                "morning": true/false,
+                "afternoon": true/false,
+                "night": true/false
+            }
+        },
+        ...
+    ]
+}
+
+                '''
+
+
+# Stored with every ScanExtraction, so scans read with an older prompt can be found and re-run
+PROMPT_VERSION = hashlib.blake2b(PRESCRIPTION_PROMPT.encode(), digest_size=8).hexdigest()
+
+Extraction = namedtuple("Extraction", "data raw_text model_name latency_ms original_size processed_size")
+
+
+def run_model(data, **preprocessing):
+    """
+    Run the prescription prompt on raw image bytes through the configured
+    EXTRACTION_BACKEND and return an Extraction with the parsed JSON, the
+    raw answer, the model name, the model latency and the scan's byte size
+    before and after preprocessing. The scan goes through
+    image_processing.preprocessing first; `preprocessing` overrides its
+    EXTRACTION_IMAGE_* settings.
+    """
+    try:
+        image = preprocess_image(data, **preprocessing)
+    except Exception as e:
+        raise ExtractionError(f"Generative ai error: {str(e)}") from e
+
+    backend = get_backend()
+    # Deadlines, retries, the circuit breaker and the concurrency limit all live in call_backend
+    text, latency_ms = call_backend(backend, PRESCRIPTION_PROMPT, image)
+
+    try:
+        parsed = parse_model_output(text)
+    except ValueError as e:
+        raise ExtractionParseError(
+            f"Json parsing error: {str(e)}", raw_text=text, model_name=backend.model_name, latency_ms=latency_ms,
+            original_size=image.original_size, processed_size=image.size,
+        ) from e
+    if parsed.issues:
+        # Kept rather than failing the request, the inference is already paid for
+        parsed.data["parse_issues"] = parsed.issues
+    return Extraction(parsed.data, text, backend.model_name, latency_ms, image.original_size, image.size)
+
+
+def extract_prescription(data, **preprocessing):
+    """ Just the parsed JSON of `run_model()`. """
+    return run_model(data, **preprocessing).data
@@ -0,0 +1,129 @@
+import hashlib
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from image_processing.backends import get_backend
+from image_processing.exceptions import ExtractionParseError
+from image_processing.extraction import run_model, PROMPT_VERSION
+from image_processing.models import ExtractionCache, ScanExtraction
+from image_processing.preprocessing import pipeline_options
+from image_processing.scan_store import store_scan
+
+
+ExtractionRun = namedtuple("ExtractionRun", "data cache_hit extraction_id")
+
+
+def content_hash(data):
+    """ BLAKE2b digest of the raw upload, 64 hex characters. """
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def cache_key(digest):
+    """
+    ExtractionCache key of the upload with content hash `digest`. It also
+    covers the prompt, the model and the preprocessing settings, so changing
+    any of them misses the entries the old pipeline produced.
+    """
+    backend = get_backend()
+    options = sorted(pipeline_options().items())
+    pipeline = f"{digest}|{PROMPT_VERSION}|{backend.name}:{backend.model_name}|{options}"
+    return hashlib.blake2b(pipeline.encode(), digest_size=32).hexdigest()
+
+
+def _fresh_entries():
+    entries = ExtractionCache.objects.all()
+    if settings.EXTRACTION_CACHE_TTL:
+        cutoff = timezone.now() - timedelta(seconds=settings.EXTRACTION_CACHE_TTL)
+        entries = entries.filter(date_updated__gte=cutoff)
+    return entries
+
+
+def lookup_extraction(digest):
+    """ The cached result for `digest`, or None when it is missing or expired. """
+    entries = _fresh_entries().filter(content_hash=digest)
+    result = entries.values_list("result", flat=True).first()
+    if result is not None:
+        entries.update(hits=F("hits") + 1)
+    return result
+
+
+def store_extraction(digest, result):
+    ExtractionCache.objects.update_or_create(content_hash=digest, defaults={"result": result, "hits": 0})
+
+
+def purge_expired_extractions():
+    """ Delete entries older than EXTRACTION_CACHE_TTL; returns how many went. """
+    if not settings.EXTRACTION_CACHE_TTL:
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=settings.EXTRACTION_CACHE_TTL)
+    deleted, _ = ExtractionCache.objects.filter(date_updated__lt=cutoff).delete()
+    return deleted
+
+
+def record_extraction(scan, extraction=None, error=None):
+    """ Save the provenance of one model run over `scan`, successful or not. """
+    if scan is None:
+        return None
+    if error is not None:
+        return ScanExtraction.objects.create(
+            scan=scan, raw_output=error.raw_text, error=str(error), model_name=error.model_name,
+            prompt_version=PROMPT_VERSION, latency_ms=error.latency_ms,
+            original_size=error.original_size, processed_size=error.processed_size,
+        )
+    return ScanExtraction.objects.create(
+        scan=scan, raw_output=extraction.raw_text, result=extraction.data, model_name=extraction.model_name,
+        prompt_version=PROMPT_VERSION, latency_ms=extraction.latency_ms,
+        original_size=extraction.original_size, processed_size=extraction.processed_size,
+    )
+
+
+def _cached_run(digest, scan):
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    result = lookup_extraction(cache_key(digest))
+    if result is None:
+        return None
+    latest = scan.extractions.filter(result__isnull=False).order_by("-id").first() if scan else None
+    return ExtractionRun(result, True, latest.id if latest else None)
+
+
+def cached_run(data, user=None):
+    """ The cached ExtractionRun for these bytes, or None when the model would have to run. """
+    digest = content_hash(data)
+    scan = store_scan(digest, data, user) if settings.SCAN_STORAGE_ENABLED else None
+    return _cached_run(digest, scan)
+
+
+def run_extraction(data, force=False, user=None):
+    """
+    Extract a prescription from raw image bytes, answering from the
+    ExtractionCache table when the same bytes were extracted within the TTL.
+
+    With SCAN_STORAGE_ENABLED the scan is kept in the scan store and every
+    model run is recorded as a ScanExtraction; `extraction_id` in the result
+    points at the run the data came from, cached or not, so
+    postPrescriptionRecord can link the record to it.
+
+    `force` skips the lookup and overwrites the cached entry. Failed
+    extractions are never cached.
+    """
+    digest = content_hash(data)
+    scan = store_scan(digest, data, user) if settings.SCAN_STORAGE_ENABLED else None
+    if not force:
+        cached = _cached_run(digest, scan)
+        if cached:
+            return cached
+
+    try:
+        extraction = run_model(data)
+    except ExtractionParseError as e:
+        record_extraction(scan, error=e)
+        raise
+    record = record_extraction(scan, extraction)
+    if settings.EXTRACTION_CACHE_ENABLED:
+        store_extraction(cache_key(digest), extraction.data)
+    return ExtractionRun(extraction.data, False, record.id if record else None)
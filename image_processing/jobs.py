@@ -0,0 +1,153 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from image_processing.exceptions import ExtractionError, ExtractionParseError, ExtractionUnavailable
+from image_processing.extraction_cache import cached_run, run_extraction
+from image_processing.models import ExtractionJob
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_extraction(image, user, force=False):
+    """
+    Store the uploaded image as a QUEUED job and wake the local workers. A
+    scan already in the extraction cache is settled as DONE straight away.
+    """
+    data = image.read()
+    cached = None if force else cached_run(data, user)
+    if cached:
+        now = timezone.now()
+        return ExtractionJob.objects.create(
+            status=ExtractionJob.DONE, result={**cached.data, "extraction_id": cached.extraction_id},
+            user_created=user, date_started=now, date_finished=now,
+        )
+    job = ExtractionJob.objects.create(image=data, force=force, user_created=user)
+    worker_pool.start()
+    worker_pool.wake()
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Put RUNNING jobs whose worker died back in the queue, or fail them once
+    they ran out of attempts.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.EXTRACTION_JOB_TIMEOUT)
+    stale = ExtractionJob.objects.filter(status=ExtractionJob.RUNNING, date_started__lt=cutoff)
+    stale.filter(attempts__gte=settings.EXTRACTION_JOB_MAX_ATTEMPTS).update(
+        status=ExtractionJob.FAILED, error="Extraction timed out", date_finished=timezone.now()
+    )
+    stale.update(status=ExtractionJob.QUEUED, locked_by="")
+
+
+def claim_next_job(worker_name):
+    """
+    Claim the oldest QUEUED job. The compare-and-set UPDATE only succeeds
+    for one worker per row, on every database backend.
+    """
+    candidates = ExtractionJob.objects.filter(status=ExtractionJob.QUEUED).order_by("id").values_list("id", flat=True)
+    for job_id in candidates[:10]:
+        claimed = ExtractionJob.objects.filter(id=job_id, status=ExtractionJob.QUEUED).update(
+            status=ExtractionJob.RUNNING,
+            locked_by=worker_name,
+            attempts=F("attempts") + 1,
+            date_started=timezone.now(),
+        )
+        if claimed:
+            return ExtractionJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """ Settle a claimed job. Returns False when the model was busy and the job went back in the queue. """
+    try:
+        run = run_extraction(bytes(job.image), force=job.force, user=job.user_created)
+        job.result = {**run.data, "extraction_id": run.extraction_id}
+        job.status = ExtractionJob.DONE
+        job.error = ""
+    except ExtractionUnavailable:
+        # Web requests get the free slots first, the queue keeps the job until one opens up
+        ExtractionJob.objects.filter(pk=job.pk).update(
+            status=ExtractionJob.QUEUED, locked_by="", attempts=F("attempts") - 1
+        )
+        return False
+    except ExtractionError as e:
+        job.status = ExtractionJob.FAILED
+        job.error = str(e)
+        if isinstance(e, ExtractionParseError):
+            job.result = {"raw_text": e.raw_text}
+    except Exception as e:
+        logger.exception("Extraction job %s crashed", job.pk)
+        job.status = ExtractionJob.FAILED
+        job.error = f"Something went wrong: {str(e)}"
+    job.image = None  # The scan is not needed once the job is settled
+    job.date_finished = timezone.now()
+    job.save(update_fields=["result", "status", "error", "image", "date_finished", "date_updated"])
+    return True
+
+
+class ExtractionWorkerPool:
+    """
+    Threads that drain the ExtractionJob table.
+
+    Every web process starts EXTRACTION_WORKERS threads when it serves its
+    first request; `manage.py run_extraction_workers` runs the same loop as
+    a dedicated process. Idle threads poll every EXTRACTION_JOB_POLL_SECONDS,
+    and an upload in the same process wakes them straight away.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self, size=None):
+        size = settings.EXTRACTION_WORKERS if size is None else size
+        with self._lock:
+            if self._threads or size <= 0:
+                return
+            prefix = f"{socket.gethostname()}:{os.getpid()}"
+            for number in range(size):
+                thread = threading.Thread(
+                    target=self.work, args=(f"{prefix}:{number}",), name=f"extraction-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def work(self, worker_name):
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_next_job(worker_name)
+                if job and run_job(job):
+                    continue
+                if not job:
+                    requeue_stale_jobs()
+            except Exception:
+                logger.exception("Extraction worker %s failed to process the queue", worker_name)
+            self._wakeup.wait(settings.EXTRACTION_JOB_POLL_SECONDS)
+            self._wakeup.clear()
+        close_old_connections()
+
+
+worker_pool = ExtractionWorkerPool()
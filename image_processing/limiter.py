@@ -0,0 +1,167 @@
+import fcntl
+import math
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from image_processing.exceptions import ExtractionBusy
+
+
+# Slot holders retry a busy host this often while they wait in the queue
+POLL_SECONDS = 0.02
+
+
+class _Slots:
+    """ `size` lock files under `directory`, each held by at most one caller on the host. """
+
+    def __init__(self, directory, prefix, size):
+        self.paths = [os.path.join(directory, f"{prefix}-{number}.lock") for number in range(size)]
+
+    def try_acquire(self):
+        """ An open, exclusively locked slot file, or None when every slot is taken. """
+        for path in self.paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def release(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def held(self):
+        """ How many slots are taken right now; a racy probe, good enough for metrics. """
+        taken = 0
+        for path in self.paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except BlockingIOError:
+                taken += 1
+            finally:
+                os.close(fd)
+        return taken
+
+
+class ExtractionLimiter:
+    """
+    Host-wide cap on concurrent model calls, shared by every worker process.
+
+    Each of the EXTRACTION_MAX_CONCURRENCY run slots and EXTRACTION_MAX_QUEUE
+    queue tickets is a lock file under EXTRACTION_LIMIT_DIR, held with a
+    flock for as long as it is used; the kernel drops the lock if a worker
+    dies. A caller that finds every run slot taken holds a queue ticket while
+    it waits; with no ticket left it is rejected at once (429), and after
+    waiting EXTRACTION_QUEUE_TIMEOUT seconds it gives up (503). Either way
+    the request thread is freed quickly, so the rest of the API keeps
+    answering while the model is slow.
+
+    Counters and wait times are per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = None
+        self._tickets = None
+        self._layout = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.waiting = 0
+        self._waits = deque(maxlen=1000)
+        self._holds = deque(maxlen=1000)
+
+    def _files(self):
+        layout = (settings.EXTRACTION_LIMIT_DIR, settings.EXTRACTION_MAX_CONCURRENCY, settings.EXTRACTION_MAX_QUEUE)
+        with self._lock:
+            if self._layout != layout:
+                os.makedirs(settings.EXTRACTION_LIMIT_DIR, exist_ok=True)
+                self._slots = _Slots(settings.EXTRACTION_LIMIT_DIR, "slot", settings.EXTRACTION_MAX_CONCURRENCY)
+                self._tickets = _Slots(settings.EXTRACTION_LIMIT_DIR, "queue", settings.EXTRACTION_MAX_QUEUE)
+                self._layout = layout
+            return self._slots, self._tickets
+
+    def retry_after(self):
+        """ Seconds a rejected client should wait: about one typical model call. """
+        with self._lock:
+            holds = list(self._holds)
+        return max(1, math.ceil(statistics.median(holds))) if holds else 1
+
+    def _acquire(self):
+        slots, tickets = self._files()
+        slot = slots.try_acquire()
+        if slot is not None:
+            return slot, 0.0
+
+        ticket = tickets.try_acquire()
+        if ticket is None:
+            with self._lock:
+                self.rejected += 1
+            raise ExtractionBusy("Extraction queue is full, try again later", self.retry_after(), queue_full=True)
+
+        start = time.monotonic()
+        deadline = start + settings.EXTRACTION_QUEUE_TIMEOUT
+        with self._lock:
+            self.waiting += 1
+        try:
+            while slot is None and time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                slot = slots.try_acquire()
+        finally:
+            _Slots.release(ticket)
+            with self._lock:
+                self.waiting -= 1
+        if slot is None:
+            with self._lock:
+                self.timed_out += 1
+            raise ExtractionBusy("Timed out waiting for a free extraction slot", self.retry_after(), queue_full=False)
+        return slot, time.monotonic() - start
+
+    @contextmanager
+    def slot(self):
+        """ Hold one run slot for the duration of the block, or raise ExtractionBusy. """
+        fd, waited = self._acquire()
+        with self._lock:
+            self.admitted += 1
+            self._waits.append(waited)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            _Slots.release(fd)
+            with self._lock:
+                self._holds.append(time.monotonic() - start)
+
+    def metrics(self):
+        slots, tickets = self._files()
+        with self._lock:
+            waits = sorted(self._waits)
+            metrics = {
+                "max_concurrency": settings.EXTRACTION_MAX_CONCURRENCY,
+                "max_queue": settings.EXTRACTION_MAX_QUEUE,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "waiting_in_process": self.waiting,
+            }
+        metrics["in_flight"] = slots.held()
+        metrics["queue_depth"] = tickets.held()
+        metrics["wait_ms"] = {
+            "p50": round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+            "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else None,
+            "max": round(waits[-1] * 1000, 1) if waits else None,
+        }
+        return metrics
+
+
+extraction_limiter = ExtractionLimiter()
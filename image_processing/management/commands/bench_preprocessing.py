@@ -0,0 +1,126 @@
+import io
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+import PIL.Image
+import PIL.ImageDraw
+from django.core.management.base import BaseCommand
+
+from image_processing.extraction import extract_prescription, ExtractionError
+from image_processing.preprocessing import preprocess_image
+
+
+VARIANTS = [
+    ("original", {"enabled": False}),
+    ("2048 jpeg q85", {"enabled": True, "max_edge": 2048, "grayscale": False, "autocontrast": False, "format": "JPEG", "quality": 85}),
+    ("1600 jpeg q80", {"enabled": True, "max_edge": 1600, "grayscale": False, "autocontrast": False, "format": "JPEG", "quality": 80}),
+    ("1280 jpeg q75", {"enabled": True, "max_edge": 1280, "grayscale": False, "autocontrast": False, "format": "JPEG", "quality": 75}),
+    ("1600 gray+contrast q80", {"enabled": True, "max_edge": 1600, "grayscale": True, "autocontrast": True, "format": "JPEG", "quality": 80}),
+    ("1600 webp q80", {"enabled": True, "max_edge": 1600, "grayscale": False, "autocontrast": False, "format": "WEBP", "quality": 80}),
+]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".heic"}
+
+
+def synthetic_scan(rng):
+    """ A 12 MP phone-photo sized page of noisy handwriting-like strokes. """
+    image = PIL.Image.new("RGB", (4000, 3000), (236, 232, 220))
+    draw = PIL.ImageDraw.Draw(image)
+    for row in range(60, 3000, 90):
+        x = 120
+        while x < 3800:
+            width = rng.randint(40, 220)
+            draw.line([(x, row + rng.randint(-8, 8)), (x + width, row + rng.randint(-8, 8))], fill=(40, 40, 90), width=5)
+            x += width + rng.randint(20, 60)
+    noise = PIL.Image.effect_noise((4000, 3000), 24).convert("RGB")
+    image = PIL.Image.blend(image, noise, 0.15)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def field_accuracy(result, expected):
+    """ Share of expected top-level fields and medication names the result reproduces. """
+    def norm(value):
+        return str(value).strip().casefold()
+
+    checks = []
+    for field, value in expected.items():
+        if field == "medications":
+            got = {norm(item.get("name", "")) for item in result.get("medications") or [] if isinstance(item, dict)}
+            checks.extend(norm(item.get("name", "")) in got for item in value or [] if isinstance(item, dict))
+        elif not isinstance(value, (list, dict)):
+            checks.append(norm(result.get(field, "")) == norm(value))
+    return sum(checks) / len(checks) if checks else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the prescription image pipeline settings: bytes sent and preprocessing time, "
+        "plus model latency and field accuracy with --with-model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("images", nargs="*", help="Scans or directories of scans (a synthetic page when omitted)")
+        parser.add_argument(
+            "--with-model", action="store_true",
+            help="Also call the model for each setting; accuracy is measured against <scan>.json when present, "
+                 "otherwise against the result for the original image",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Preprocessing runs per scan and setting")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def _scans(self, paths, rng):
+        scans = []
+        for path in map(Path, paths):
+            files = sorted(path.iterdir()) if path.is_dir() else [path]
+            for file in files:
+                if file.suffix.lower() in IMAGE_SUFFIXES:
+                    expected = file.with_suffix(".json")
+                    scans.append((file.name, file.read_bytes(), json.loads(expected.read_text()) if expected.exists() else None))
+        return scans or [("synthetic", synthetic_scan(rng), None)]
+
+    def handle(self, *args, **options):
+        scans = self._scans(options["images"], random.Random(options["seed"]))
+        with_model = options["with_model"]
+
+        header = f"{'setting':<24} {'KB in':>8} {'KB out':>8} {'prep ms':>8}"
+        if with_model:
+            header += f" {'model ms':>9} {'accuracy':>9}"
+        self.stdout.write(header)
+
+        references = {}
+        for label, variant in VARIANTS:
+            sizes_in, sizes_out, prep_times, model_times, accuracies = [], [], [], [], []
+            for name, data, expected in scans:
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    processed = preprocess_image(data, **variant)
+                    prep_times.append((time.perf_counter() - start) * 1000)
+                sizes_in.append(processed.original_size / 1024)
+                sizes_out.append(processed.size / 1024)
+
+                if with_model:
+                    start = time.perf_counter()
+                    try:
+                        result = extract_prescription(data, **variant)
+                    except ExtractionError as e:
+                        self.stderr.write(f"{label} / {name}: {e}")
+                        continue
+                    model_times.append((time.perf_counter() - start) * 1000)
+                    references.setdefault(name, result)
+                    accuracy = field_accuracy(result, expected or references[name])
+                    if accuracy is not None:
+                        accuracies.append(accuracy)
+
+            line = (
+                f"{label:<24} {statistics.mean(sizes_in):>8.0f} {statistics.mean(sizes_out):>8.0f} "
+                f"{statistics.median(prep_times):>8.1f}"
+            )
+            if with_model:
+                model_ms = f"{statistics.median(model_times):.0f}" if model_times else "-"
+                accuracy = f"{statistics.mean(accuracies):.0%}" if accuracies else "-"
+                line += f" {model_ms:>9} {accuracy:>9}"
+            self.stdout.write(line)
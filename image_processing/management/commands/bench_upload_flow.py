@@ -0,0 +1,141 @@
+import io
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import PIL.Image
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from image_processing.models import PrescriptionRecord
+from users.models import Patient, User
+
+
+def synthetic_upload(rng, width, height):
+    """ A distinct noisy JPEG per request, so no request is served from a cache. """
+    image = PIL.Image.effect_noise((width, height), rng.randint(20, 60)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def record_payload(extracted, number):
+    """ The postPrescriptionRecord body the front end builds from an extraction. """
+    names = extracted.get("patient_name", "").split() or ["patient"]
+    # A unique middle name keeps every request a new patient
+    patient_name = " ".join([names[0], f"bench{number}", names[-1]])
+    return {
+        "action": "postPrescriptionRecord",
+        "patient_name": patient_name,
+        "prescription_date": extracted.get("prescription_date") or None,
+        "medications": extracted.get("medications", []),
+        "complaints": extracted.get("complaints", []),
+        "gender": extracted.get("gender", ""),
+        "age": extracted.get("age", ""),
+        "weight": extracted.get("weight", ""),
+        "bp": extracted.get("bp", ""),
+        "place": extracted.get("place", ""),
+        "pulse": extracted.get("pulse", ""),
+        "lab_test": extracted.get("Lab_test", []),
+        "follow_up_date": extracted.get("follow_up_date") or None,
+        "type": "N",
+    }
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark upload -> parse -> postPrescriptionRecord throughput against the offline stub "
+        "extraction backend. Records and patients it creates are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--latency-ms", type=float, default=1500, help="Stub model latency")
+        parser.add_argument("--jitter-ms", type=float, default=500, help="Extra stub latency, up to this much")
+        parser.add_argument("--size", default="3000x4000", help="Upload resolution, WIDTHxHEIGHT")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        width, height = (int(side) for side in options["size"].lower().split("x"))
+        uploads = [synthetic_upload(rng, width, height) for _ in range(options["requests"])]
+        user = User.objects.create(
+            phone=f"bench{rng.randrange(10 ** 9)}", email=f"bench{rng.randrange(10 ** 9)}@bench.local",
+            first_name="Bench", last_name="User",
+        )
+        timings = {"extract": [], "record": [], "total": []}
+        record_ids, patient_ids, failures = [], [], []
+        lock = threading.Lock()
+
+        def run(number):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start = time.perf_counter()
+                upload = SimpleUploadedFile(f"scan{number}.jpg", uploads[number], content_type="image/jpeg")
+                response = client.post("/prescription/imageprocess/", {"image": upload}, format="multipart")
+                extracted_at = time.perf_counter()
+                if response.status_code != 200:
+                    raise RuntimeError(f"imageprocess answered {response.status_code}: {response.content[:200]}")
+                response = client.post("/prescription/", record_payload(response.data, number), format="json")
+                finished = time.perf_counter()
+                if response.status_code != 201:
+                    raise RuntimeError(f"postPrescriptionRecord answered {response.status_code}: {response.content[:200]}")
+                with lock:
+                    timings["extract"].append((extracted_at - start) * 1000)
+                    timings["record"].append((finished - extracted_at) * 1000)
+                    timings["total"].append((finished - start) * 1000)
+                    record_ids.append(response.data["data"]["id"])
+                    patient_ids.append(response.data["data"]["patient"])
+            except Exception as e:
+                with lock:
+                    failures.append(str(e))
+            finally:
+                close_old_connections()
+
+        stub = {
+            "EXTRACTION_BACKEND": "stub",
+            "EXTRACTION_STUB_LATENCY_MS": options["latency_ms"],
+            "EXTRACTION_STUB_JITTER_MS": options["jitter_ms"],
+            "EXTRACTION_CACHE_ENABLED": False,
+            # Stub runs must leave no PrescriptionScan or ScanExtraction rows or files behind
+            "SCAN_STORAGE_ENABLED": False,
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        try:
+            with override_settings(**stub):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(options["concurrency"]) as pool:
+                    list(pool.map(run, range(options["requests"])))
+                elapsed = time.perf_counter() - start
+        finally:
+            PrescriptionRecord.objects.filter(id__in=record_ids).delete()
+            Patient.objects.filter(id__in=patient_ids).delete()
+            user.delete()
+
+        done = len(timings["total"])
+        self.stdout.write(
+            f"{done}/{options['requests']} requests in {elapsed:.2f}s "
+            f"({done / elapsed:.1f} req/s, concurrency {options['concurrency']})"
+        )
+        if done:
+            self.stdout.write(f"{'stage':<8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+            for stage, values in timings.items():
+                self.stdout.write(
+                    f"{stage:<8} {statistics.median(values):>8.1f} {percentile(values, 0.95):>8.1f} "
+                    f"{statistics.mean(values):>8.1f}"
+                )
+        for failure in failures[:5]:
+            self.stderr.write(failure)
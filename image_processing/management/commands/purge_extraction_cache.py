@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from image_processing.extraction_cache import purge_expired_extractions
+
+
+class Command(BaseCommand):
+    help = "Delete cached prescription extractions older than EXTRACTION_CACHE_TTL."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_extractions()
+        self.stdout.write(f"Deleted {deleted} expired extraction cache entries")
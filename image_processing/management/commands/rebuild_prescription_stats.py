@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from image_processing.prescription_stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the PrescriptionDailyStat rollup from PrescriptionRecord, e.g. after records were "
+        "changed with raw SQL or queryset.update(). Without dates every day is rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="from_date", type=date.fromisoformat,
+                            help="First prescription date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="to_date", type=date.fromisoformat,
+                            help="Last prescription date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        cells = rebuild_stats(options["from_date"], options["to_date"])
+        self.stdout.write(f"Rebuilt {cells} prescription stat cells")
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from image_processing.exceptions import ExtractionError, ExtractionParseError
+from image_processing.extraction import run_model, PROMPT_VERSION
+from image_processing.extraction_cache import record_extraction
+from image_processing.models import PrescriptionScan, ScanExtraction
+from image_processing.scan_store import scan_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run extraction over stored scans, e.g. after a prompt or model change. Every run is saved as "
+        "a new ScanExtraction; PrescriptionRecords are left as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only scans uploaded on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--limit", type=int, help="Stop after this many scans")
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Also re-run scans that already have an extraction with the current prompt",
+        )
+        parser.add_argument("--backend", help="EXTRACTION_BACKEND to use for this run")
+
+    def handle(self, *args, **options):
+        scans = PrescriptionScan.objects.order_by("id")
+        if options["since"]:
+            scans = scans.filter(date_created__date__gte=options["since"])
+        if not options["all"]:
+            current = ScanExtraction.objects.filter(prompt_version=PROMPT_VERSION, result__isnull=False)
+            scans = scans.exclude(id__in=current.values("scan_id"))
+        if options["limit"]:
+            scans = scans[:options["limit"]]
+
+        overrides = {"EXTRACTION_BACKEND": options["backend"]} if options["backend"] else {}
+        done = failed = 0
+        with override_settings(**overrides):
+            for scan in scans.iterator():
+                try:
+                    record_extraction(scan, run_model(scan_store.read(scan.path)))
+                    done += 1
+                except ExtractionParseError as e:
+                    record_extraction(scan, error=e)
+                    failed += 1
+                except (ExtractionError, OSError) as e:
+                    self.stderr.write(f"{scan.content_hash}: {e}")
+                    failed += 1
+        self.stdout.write(f"Re-extracted {done} scans with prompt {PROMPT_VERSION}, {failed} failed")
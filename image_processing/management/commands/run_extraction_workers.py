@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from image_processing.jobs import ExtractionWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run a pool of threads that process queued prescription extraction jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=max(settings.EXTRACTION_WORKERS, 1))
+
+    def handle(self, *args, **options):
+        pool = ExtractionWorkerPool()
+        pool.start(options["threads"])
+        self.stdout.write(f"Processing extraction jobs with {options['threads']} threads")
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pool.stop()
+            pool.join()
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_processing', '0002_extractionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Content Hash')),
+                ('result', models.JSONField(verbose_name='Result')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Hits')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Extraction Cache',
+                'verbose_name_plural': 'Extraction Cache',
+                'db_table': 'ExtractionCache',
+            },
+        ),
+        migrations.AddField(
+            model_name='extractionjob',
+            name='force',
+            field=models.BooleanField(default=False, verbose_name='Force Re-extraction'),
+        ),
+    ]
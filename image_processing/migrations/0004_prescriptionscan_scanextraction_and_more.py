@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_processing', '0003_extractioncache_extractionjob_force'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrescriptionScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Content Hash')),
+                ('path', models.CharField(max_length=255, verbose_name='Path')),
+                ('size', models.PositiveIntegerField(verbose_name='Size')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('user_created', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Prescription Scan',
+                'verbose_name_plural': 'Prescription Scans',
+                'db_table': 'PrescriptionScan',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScanExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_output', models.TextField(blank=True, verbose_name='Raw Output')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('model_name', models.CharField(max_length=100, verbose_name='Model Name')),
+                ('prompt_version', models.CharField(max_length=16, verbose_name='Prompt Version')),
+                ('latency_ms', models.PositiveIntegerField(verbose_name='Latency (ms)')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extractions', to='image_processing.prescriptionscan', verbose_name='Scan')),
+            ],
+            options={
+                'verbose_name': 'Scan Extraction',
+                'verbose_name_plural': 'Scan Extractions',
+                'db_table': 'ScanExtraction',
+            },
+        ),
+        migrations.AddField(
+            model_name='prescriptionrecord',
+            name='extraction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='prescription_records', to='image_processing.scanextraction', verbose_name='Extraction'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_processing', '0004_prescriptionscan_scanextraction_and_more'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prescriptionrecord',
+            index=models.Index(fields=['prescription_date', 'gender', 'type'], name='prescription_date_gender_type'),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionrecord',
+            index=models.Index(fields=['-date_updated', '-id'], name='prescription_updated_id'),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionrecord',
+            index=models.Index(fields=['type', '-date_updated'], name='prescription_type_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionrecord',
+            index=models.Index(fields=['patient_name', '-date_updated'], name='prescription_name_updated'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_daily_stats(apps, schema_editor):
+    PrescriptionRecord = apps.get_model("image_processing", "PrescriptionRecord")
+    PrescriptionDailyStat = apps.get_model("image_processing", "PrescriptionDailyStat")
+    cells = (
+        PrescriptionRecord.objects.exclude(prescription_date=None).order_by()
+        .values("prescription_date", "gender", "type").annotate(count=Count("id"))
+    )
+    PrescriptionDailyStat.objects.bulk_create(
+        [PrescriptionDailyStat(date=cell["prescription_date"], gender=cell["gender"], type=cell["type"],
+                               count=cell["count"]) for cell in cells],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_processing', '0005_prescriptionrecord_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrescriptionDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('gender', models.CharField(blank=True, max_length=50, verbose_name='Gender')),
+                ('type', models.CharField(blank=True, max_length=50, verbose_name='Type')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Prescription Daily Stat',
+                'verbose_name_plural': 'Prescription Daily Stats',
+                'db_table': 'PrescriptionDailyStat',
+                'constraints': [models.UniqueConstraint(fields=('date', 'gender', 'type'), name='prescriptiondailystat_cell')],
+            },
+        ),
+        migrations.RunPython(fill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_processing', '0006_prescriptiondailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanextraction',
+            name='original_size',
+            field=models.PositiveIntegerField(default=0, verbose_name='Original Size (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='scanextraction',
+            name='processed_size',
+            field=models.PositiveIntegerField(default=0, verbose_name='Processed Size (bytes)'),
+        ),
+    ]
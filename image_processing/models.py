@@ -1,5 +1,5 @@
 from django.db import models
-from users.models import Patient
+from users.models import Patient, User
 
 class PrescriptionRecord(models.Model):
 
@@ -85,6 +85,15 @@ class PrescriptionRecord(models.Model):
         null=True
     )
 
+    extraction = models.ForeignKey(
+        "ScanExtraction",
+        on_delete=models.SET_NULL,
+        related_name="prescription_records",
+        verbose_name="Extraction",
+        blank=True,
+        null=True
+    )
+
     date_created = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Date Created"
@@ -99,6 +108,304 @@ class PrescriptionRecord(models.Model):
         db_table = "PrescriptionRecord"
         verbose_name = "Prescription Record"
         verbose_name_plural = "Prescription Record"
+        indexes = [
+            # Dashboard counts: a date range bucketed by gender and type, answered from the index alone
+            models.Index(fields=["prescription_date", "gender", "type"], name="prescription_date_gender_type"),
+            # Listings, newest first, and their (date_updated, id) cursors
+            models.Index(fields=["-date_updated", "-id"], name="prescription_updated_id"),
+            models.Index(fields=["type", "-date_updated"], name="prescription_type_updated"),
+            # patient_name startswith search
+            models.Index(fields=["patient_name", "-date_updated"], name="prescription_name_updated"),
+        ]
 
     def __str__(self):
         return self.patient_name
+
+
+class ExtractionJob(models.Model):
+    """
+    Queued prescription extraction. The table doubles as the work queue:
+    workers claim QUEUED rows with a conditional UPDATE, so no broker is needed.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name="Status"
+    )
+
+    image = models.BinaryField(
+        verbose_name="Image",
+        null=True
+    )
+
+    result = models.JSONField(
+        verbose_name="Result",
+        blank=True,
+        null=True
+    )
+
+    error = models.TextField(
+        verbose_name="Error",
+        blank=True
+    )
+
+    attempts = models.PositiveIntegerField(
+        verbose_name="Attempts",
+        default=0
+    )
+
+    locked_by = models.CharField(
+        max_length=100,
+        verbose_name="Locked By",
+        blank=True
+    )
+
+    force = models.BooleanField(
+        verbose_name="Force Re-extraction",
+        default=False
+    )
+
+    user_created = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+
+    date_started = models.DateTimeField(
+        verbose_name="Date Started",
+        blank=True,
+        null=True
+    )
+
+    date_finished = models.DateTimeField(
+        verbose_name="Date Finished",
+        blank=True,
+        null=True
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "ExtractionJob"
+        verbose_name = "Extraction Job"
+        verbose_name_plural = "Extraction Jobs"
+        indexes = [
+            models.Index(fields=["status", "id"], name="extractionjob_status_id"),
+        ]
+
+    def __str__(self):
+        return f"ExtractionJob {self.pk} ({self.status})"
+
+
+class ExtractionCache(models.Model):
+    """
+    Extraction result for one exact scan, keyed on the BLAKE2 digest of the
+    uploaded bytes and the extraction pipeline (prompt, model, preprocessing),
+    so a re-uploaded photo never reaches the same model twice.
+    """
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Content Hash"
+    )
+
+    result = models.JSONField(
+        verbose_name="Result"
+    )
+
+    hits = models.PositiveIntegerField(
+        verbose_name="Hits",
+        default=0
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "ExtractionCache"
+        verbose_name = "Extraction Cache"
+        verbose_name_plural = "Extraction Cache"
+
+    def __str__(self):
+        return self.content_hash
+
+
+class PrescriptionScan(models.Model):
+    """
+    An uploaded scan kept in the content-addressed store under
+    SCAN_STORAGE_ROOT. The same bytes uploaded twice share one row and one file.
+    """
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Content Hash"
+    )
+
+    path = models.CharField(
+        max_length=255,
+        verbose_name="Path"
+    )
+
+    size = models.PositiveIntegerField(
+        verbose_name="Size"
+    )
+
+    user_created = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    class Meta:
+        db_table = "PrescriptionScan"
+        verbose_name = "Prescription Scan"
+        verbose_name_plural = "Prescription Scans"
+
+    def __str__(self):
+        return self.path
+
+
+class ScanExtraction(models.Model):
+    """
+    One model run over a scan: the raw answer, the parsed result (null when
+    the answer held no JSON), the model, prompt version and latency, and the
+    byte size of the scan before and after preprocessing.
+    """
+    scan = models.ForeignKey(
+        PrescriptionScan,
+        on_delete=models.CASCADE,
+        related_name="extractions",
+        verbose_name="Scan"
+    )
+
+    raw_output = models.TextField(
+        verbose_name="Raw Output",
+        blank=True
+    )
+
+    result = models.JSONField(
+        verbose_name="Result",
+        blank=True,
+        null=True
+    )
+
+    error = models.TextField(
+        verbose_name="Error",
+        blank=True
+    )
+
+    model_name = models.CharField(
+        max_length=100,
+        verbose_name="Model Name"
+    )
+
+    prompt_version = models.CharField(
+        max_length=16,
+        verbose_name="Prompt Version"
+    )
+
+    latency_ms = models.PositiveIntegerField(
+        verbose_name="Latency (ms)"
+    )
+
+    original_size = models.PositiveIntegerField(
+        verbose_name="Original Size (bytes)",
+        default=0
+    )
+
+    processed_size = models.PositiveIntegerField(
+        verbose_name="Processed Size (bytes)",
+        default=0
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    class Meta:
+        db_table = "ScanExtraction"
+        verbose_name = "Scan Extraction"
+        verbose_name_plural = "Scan Extractions"
+
+    def __str__(self):
+        return f"{self.scan_id} / {self.model_name}"
+
+
+class PrescriptionDailyStat(models.Model):
+    """
+    Materialized prescription counts: how many records share one
+    prescription_date, gender and type. Kept up to date by the
+    PrescriptionRecord signals, so dashboard statistics read a few rows
+    per day instead of every prescription; `manage.py
+    rebuild_prescription_stats` recomputes it from the records.
+    """
+
+    date = models.DateField(
+        verbose_name="Date"
+    )
+
+    gender = models.CharField(
+        max_length=50,
+        verbose_name="Gender",
+        blank=True
+    )
+
+    type = models.CharField(
+        max_length=50,
+        verbose_name="Type",
+        blank=True
+    )
+
+    count = models.IntegerField(
+        verbose_name="Count",
+        default=0
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "PrescriptionDailyStat"
+        verbose_name = "Prescription Daily Stat"
+        verbose_name_plural = "Prescription Daily Stats"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "gender", "type"], name="prescriptiondailystat_cell"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.gender}/{self.type}: {self.count}"
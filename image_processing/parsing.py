@@ -0,0 +1,279 @@
+import json
+import re
+from collections import namedtuple
+from datetime import datetime
+
+
+ParsedExtraction = namedtuple("ParsedExtraction", "data issues")
+
+_CLOSERS = {"{": "}", "[": "]"}
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class JsonObjectScanner:
+    """
+    Incremental scanner for the first balanced `{...}` object in a stream of
+    text chunks. Prose, markdown fences and anything after the object are
+    ignored; braces inside strings are not counted.
+
+        scanner = JsonObjectScanner()
+        for chunk in chunks:
+            if scanner.feed(chunk):
+                break
+        text = scanner.text()
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """ Consume `chunk`; returns True once the object is closed. """
+        if self.complete:
+            return True
+        start = 0
+        if not self.started:
+            start = chunk.find("{")
+            if start < 0:
+                return False
+            self.started = True
+
+        for position in range(start, len(chunk)):
+            char = chunk[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(_CLOSERS[char])
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if not self._stack:
+                    self._parts.append(chunk[start:position + 1])
+                    self.complete = True
+                    return True
+        self._parts.append(chunk[start:])
+        return False
+
+    def raw(self):
+        """ The object text seen so far, as received. """
+        return "".join(self._parts)
+
+    def text(self):
+        """ The object seen so far, closed off if the stream ended inside it. """
+        text = self.raw()
+        if self.complete or not self.started:
+            return text
+        if self._in_string:
+            text += '"'
+        # Drop a dangling separator or key before closing what is still open
+        text = re.sub(r'(,\s*|,?\s*"[^"]*"\s*:\s*)$', "", text)
+        return text + "".join(reversed(self._stack))
+
+
+def _close(prefix):
+    scanner = JsonObjectScanner()
+    scanner.feed(prefix)
+    return scanner.text()
+
+
+def load_first_object(text):
+    """
+    Parse the first JSON object in `text`. Returns `(object, issues)`;
+    raises ValueError when there is no object at all.
+
+    A balanced `{...}` that is not JSON, e.g. braces in the model's prose,
+    is skipped and the search goes on after it. A cut off object is closed
+    and, if the last member is itself incomplete, trimmed back one member
+    at a time until it parses.
+    """
+    offset = text.find("{")
+    if offset < 0:
+        raise ValueError("No JSON object in the model output")
+    while True:
+        scanner = JsonObjectScanner()
+        scanner.feed(text[offset:])
+        loaded = _load_candidate(scanner)
+        if loaded is not None:
+            return loaded
+        if not scanner.complete:
+            break
+        offset = text.find("{", offset + len(scanner.raw()))
+        if offset < 0:
+            raise ValueError("The JSON object in the model output is malformed")
+
+    prefix = scanner.raw()
+    while "," in prefix:
+        prefix = prefix[:prefix.rindex(",")]
+        try:
+            return json.loads(_TRAILING_COMMA.sub(r"\1", _close(prefix))), [
+                "Model output was cut off, its last incomplete entries were dropped"
+            ]
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("The JSON object in the model output is cut off too early to recover")
+
+
+def _load_candidate(scanner):
+    """ `(object, issues)` of the object `scanner` found, or None when it does not parse as it is. """
+    candidate = scanner.text()
+    for repair in (None, "trailing commas"):
+        if repair:
+            # Trailing commas are the most common slip in otherwise valid model JSON
+            candidate = _TRAILING_COMMA.sub(r"\1", candidate)
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        issues = [] if scanner.complete else ["Model output was cut off, the JSON object was closed automatically"]
+        return value, issues + ([f"Removed {repair} from the model output"] if repair else [])
+    return None
+
+
+# Output format of PRESCRIPTION_PROMPT
+STRING_FIELDS = ("patient_name", "age", "weight", "bp", "place", "pulse")
+DATE_FIELDS = ("prescription_date", "follow_up_date")
+LIST_FIELDS = ("complaints", "Lab_test", "medications")
+SCHEMA_FIELDS = STRING_FIELDS + ("gender", "type") + DATE_FIELDS + LIST_FIELDS
+TIMINGS = ("morning", "afternoon", "night")
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%d-%m-%y", "%d %b %Y", "%d %B %Y", "%Y/%m/%d")
+_GENDERS = {"m": "M", "male": "M", "f": "F", "female": "F"}
+_TYPES = {"o": "O", "old": "O", "n": "N", "new": "N", "l": "L", "late": "L"}
+# Per the prompt a dose (1, 2, 1/2) marks the slot as taken, x, 0 or a dash as skipped
+_DOSE = re.compile(r"[1-9½]")
+
+
+def _as_string(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def _as_date(value):
+    """ ISO date string for the formats doctors and the model tend to write, or None. """
+    text = _as_string(value)
+    if not text:
+        return ""
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value > 0
+    text = _as_string(value).lower()
+    return text in ("true", "yes", "y") or bool(_DOSE.search(text))
+
+
+def _as_list(value):
+    if value in (None, ""):
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [value]
+
+
+def _medication(item):
+    if isinstance(item, str):
+        return {"name": item.strip(), "timing": {timing: False for timing in TIMINGS}}
+    if not isinstance(item, dict):
+        return None
+    timing = item.get("timing")
+    if isinstance(timing, str):
+        # "1-0-1" style patterns the model copied instead of interpreting
+        slots = re.split(r"[\s\-]+", timing.strip())
+        timing = dict(zip(TIMINGS, slots)) if len(slots) == 3 else {}
+    timing = timing if isinstance(timing, dict) else {}
+    medication = dict(item)
+    medication["name"] = _as_string(item.get("name"))
+    medication["timing"] = {slot: _as_bool(timing.get(slot, False)) for slot in TIMINGS}
+    return medication
+
+
+def _lab_test(item):
+    if isinstance(item, dict):
+        return {_as_string(key): _as_string(value) for key, value in item.items()}
+    text = _as_string(item)
+    return {text: ""} if text else None
+
+
+def coerce_prescription(value):
+    """
+    Fit a decoded model answer to the prompt's output format. Every schema
+    field is present in the result; values are converted to the expected
+    types where that is unambiguous (dates to YYYY-MM-DD, timings to
+    booleans, gender and type to their codes) and blanked otherwise, with
+    a note in `issues`. Unknown keys are kept as they are.
+    """
+    issues = []
+    if not isinstance(value, dict):
+        return ParsedExtraction({field: [] if field in LIST_FIELDS else "" for field in SCHEMA_FIELDS},
+                                ["Model output is not a JSON object"])
+
+    # The model is not always consistent about key case, e.g. "lab_test"
+    by_lower = {key.lower(): key for key in value}
+    data = {key: item for key, item in value.items() if key.lower() not in {field.lower() for field in SCHEMA_FIELDS}}
+    raw = {field: value.get(by_lower.get(field.lower())) for field in SCHEMA_FIELDS}
+
+    for field in STRING_FIELDS:
+        data[field] = _as_string(raw[field])
+
+    gender = _as_string(raw["gender"])
+    data["gender"] = _GENDERS.get(gender.lower(), "")
+    if gender and not data["gender"]:
+        issues.append(f"gender: unrecognised value {gender!r}")
+
+    prescription_type = _as_string(raw["type"])
+    data["type"] = _TYPES.get(prescription_type.lower(), "")
+    if prescription_type and not data["type"]:
+        issues.append(f"type: unrecognised value {prescription_type!r}")
+
+    for field in DATE_FIELDS:
+        parsed = _as_date(raw[field])
+        if parsed is None:
+            issues.append(f"{field}: unrecognised date {raw[field]!r}")
+        data[field] = parsed or ""
+
+    data["complaints"] = [_as_string(item) for item in _as_list(raw["complaints"]) if _as_string(item)]
+    data["Lab_test"] = [test for test in map(_lab_test, _as_list(raw["Lab_test"])) if test]
+
+    medications = []
+    for item in _as_list(raw["medications"]):
+        medication = _medication(item)
+        if medication and medication["name"]:
+            medications.append(medication)
+        else:
+            issues.append(f"medications: dropped unreadable entry {item!r}")
+    data["medications"] = medications
+    return ParsedExtraction(data, issues)
+
+
+def parse_model_output(text):
+    """
+    Decode and normalize a model answer. Raises ValueError only when the
+    text holds no JSON object at all; anything salvageable comes back with
+    the problems listed in `issues`.
+    """
+    value, issues = load_first_object(text)
+    parsed = coerce_prescription(value)
+    return ParsedExtraction(parsed.data, issues + parsed.issues)
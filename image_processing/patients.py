@@ -0,0 +1,39 @@
+from users.models import Patient
+
+
+def split_patient_name(name):
+    """ `(first, middle, last)` of a lower-cased full name; parts that are not there are None. """
+    name_parts = name.split()
+    first_name = name_parts[0] if len(name_parts) > 0 else None
+    last_name = name_parts[-1] if len(name_parts) > 1 else None
+    middle_name = name_parts[1] if len(name_parts) > 2 else None
+    return first_name, middle_name, last_name
+
+
+def existing_patient_for(name):
+    """
+    A patient that a new prescription under `name` would clash with. Without
+    a middle name, any patient with the same first and last name counts.
+    """
+    first_name, middle_name, last_name = split_patient_name(name)
+    base_qs = Patient.objects.filter(
+        first_name__iexact=first_name,
+        last_name__iexact=last_name
+    )
+    if middle_name:
+        # Check for exact match with middle name
+        return base_qs.filter(middle_name__iexact=middle_name).first()
+    # If no middle name is given, block creation if *any* patient exists with same first+last
+    return base_qs.exclude(middle_name=None).first()
+
+
+def create_patient_from_name(name, phone=None, place="", user_created=None):
+    first_name, middle_name, last_name = split_patient_name(name)
+    return Patient.objects.create(
+        first_name=first_name or "",
+        middle_name=middle_name or "",
+        last_name=last_name or "",
+        phone=phone,
+        address=place,
+        user_created=user_created
+    )
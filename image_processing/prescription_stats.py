@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from image_processing.models import PrescriptionDailyStat, PrescriptionRecord
+
+# Response key and condition of every bucket getPrescriptionCount reports
+BUCKETS = {
+    "Male": Q(gender="M"),
+    "Female": Q(gender="F"),
+    "Old": Q(type="O"),
+    "New": Q(type="N"),
+    "Late": Q(type="L"),
+}
+# Filters the daily rollup can answer on its own, anything else needs the records
+STAT_FILTERS = {"gender", "type"}
+
+
+def _bucket_counts():
+    return {"total_count": Count("id"), **{name: Count("id", filter=condition) for name, condition in BUCKETS.items()}}
+
+
+def prescription_counts(queryset):
+    """ Total and per-bucket counts of `queryset`, in one conditional aggregation query. """
+    return queryset.aggregate(**_bucket_counts())
+
+
+def daily_prescription_counts(queryset):
+    """ The same counts per prescription_date, oldest day first, again in one query. """
+    rows = queryset.order_by().values("prescription_date").annotate(**_bucket_counts()).order_by("prescription_date")
+    return [{**row, "prescription_date": row["prescription_date"].isoformat()} for row in rows]
+
+
+def _bucket_sums():
+    return {
+        "total_count": Coalesce(Sum("count"), 0),
+        **{name: Coalesce(Sum("count", filter=condition), 0) for name, condition in BUCKETS.items()},
+    }
+
+
+def _stats(from_date, to_date, filters):
+    return PrescriptionDailyStat.objects.filter(date__range=[from_date, to_date], count__gt=0, **filters)
+
+
+def stat_counts(from_date, to_date, **filters):
+    """ prescription_counts() for a date range, read from the daily rollup. """
+    return _stats(from_date, to_date, filters).aggregate(**_bucket_sums())
+
+
+def daily_stat_counts(from_date, to_date, **filters):
+    """ daily_prescription_counts() for a date range, read from the daily rollup. """
+    rows = _stats(from_date, to_date, filters).values("date").annotate(**_bucket_sums()).order_by("date")
+    return [{"prescription_date": row.pop("date").isoformat(), **row} for row in rows]
+
+
+def stat_key(record):
+    """ The `(date, gender, type)` rollup cell `record` counts in, or None without a prescription date. """
+    prescription_date = PrescriptionRecord._meta.get_field("prescription_date").to_python(record.prescription_date)
+    if not prescription_date:
+        return None
+    return prescription_date, record.gender or "", record.type or ""
+
+
+def adjust_stat(key, delta):
+    """ Add `delta` records to the rollup cell `key`, creating the cell on first use. """
+    if key is None:
+        return
+    date, gender, prescription_type = key
+    cell = PrescriptionDailyStat.objects.filter(date=date, gender=gender, type=prescription_type)
+    if cell.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            PrescriptionDailyStat.objects.create(date=date, gender=gender, type=prescription_type, count=delta)
+    except IntegrityError:
+        # Another save created the cell in the meantime
+        cell.update(count=F("count") + delta)
+
+
+def add_to_stats(records):
+    """ Count records that were written without signals, e.g. by bulk_create. """
+    for key, count in Counter(stat_key(record) for record in records).items():
+        adjust_stat(key, count)
+
+
+def rebuild_stats(from_date=None, to_date=None):
+    """
+    Recompute the rollup from PrescriptionRecord, for every day or only
+    those between `from_date` and `to_date`. Returns the number of cells
+    written.
+    """
+    records = PrescriptionRecord.objects.exclude(prescription_date=None)
+    stats = PrescriptionDailyStat.objects.all()
+    if from_date:
+        records = records.filter(prescription_date__gte=from_date)
+        stats = stats.filter(date__gte=from_date)
+    if to_date:
+        records = records.filter(prescription_date__lte=to_date)
+        stats = stats.filter(date__lte=to_date)
+
+    cells = records.order_by().values("prescription_date", "gender", "type").annotate(count=Count("id"))
+    with transaction.atomic():
+        stats.delete()
+        created = PrescriptionDailyStat.objects.bulk_create(
+            (PrescriptionDailyStat(date=cell["prescription_date"], gender=cell["gender"], type=cell["type"],
+                                   count=cell["count"]) for cell in cells),
+            batch_size=500,
+        )
+    return len(created)
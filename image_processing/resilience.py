@@ -0,0 +1,150 @@
+import logging
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from image_processing.exceptions import ExtractionError, ExtractionTimeout, ExtractionUnavailable
+from image_processing.limiter import extraction_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Fails extraction fast while the model backend is unhealthy.
+
+    CLOSED lets every call through. After EXTRACTION_BREAKER_FAILURES
+    consecutive transient failures (timeouts, connection errors, 5xx and
+    rate limits) it turns OPEN and rejects calls at once for
+    EXTRACTION_BREAKER_RESET_SECONDS, instead of letting each request sit
+    through timeouts and retries. Then it goes HALF_OPEN and lets a single
+    trial call through: success closes it again, failure reopens it.
+
+    State is per process, so each gunicorn worker trips on its own failures.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _reopen_in(self):
+        return self.opened_at + settings.EXTRACTION_BREAKER_RESET_SECONDS - time.monotonic()
+
+    def before_call(self):
+        """ Raise ExtractionUnavailable unless a call may go out now. """
+        with self._lock:
+            if self.state == self.OPEN and self._reopen_in() <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self.trial_running):
+                self.trial_running = self.state == self.HALF_OPEN
+                return
+            self.rejected += 1
+            retry_after = max(1, math.ceil(self._reopen_in())) if self.state == self.OPEN else 1
+        raise ExtractionUnavailable("Extraction service is unavailable, try again later", retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_running = False
+
+    def cancel_trial(self):
+        """
+        The call says nothing about the backend's health, e.g. it never
+        reached it or was rejected as a bad request; let the next one be the
+        trial instead.
+        """
+        with self._lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= settings.EXTRACTION_BREAKER_FAILURES:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning("Extraction circuit breaker opened after %d failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "reopens_in_seconds": round(max(self._reopen_in(), 0), 1) if self.state == self.OPEN else None,
+            }
+
+
+extraction_breaker = CircuitBreaker()
+
+
+def backoff(attempt):
+    """ Full-jitter exponential backoff before retry number `attempt` (0-based). """
+    ceiling = min(settings.EXTRACTION_RETRY_MAX_SECONDS, settings.EXTRACTION_RETRY_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def call_backend(backend, prompt, image):
+    """
+    `backend.generate()` under the extraction deadline: each attempt gets
+    at most EXTRACTION_CALL_TIMEOUT seconds and all of them together
+    EXTRACTION_DEADLINE seconds. Transient failures are retried up to
+    EXTRACTION_RETRIES times with jittered exponential backoff while the
+    deadline allows. Every attempt passes the circuit breaker and holds a
+    limiter slot only while the call is in flight, not while backing off.
+
+    Returns `(text, latency_ms)` of the successful attempt.
+    """
+    deadline = time.monotonic() + settings.EXTRACTION_DEADLINE
+    attempt = 0
+    while True:
+        extraction_breaker.before_call()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            extraction_breaker.cancel_trial()
+            raise ExtractionTimeout("Generative ai error: extraction deadline exceeded")
+        try:
+            with extraction_limiter.slot():
+                start = time.perf_counter()
+                text = backend.generate(prompt, image, timeout=min(settings.EXTRACTION_CALL_TIMEOUT, remaining))
+                latency_ms = round((time.perf_counter() - start) * 1000)
+        except ExtractionError:
+            # The limiter turned the call away before it reached the backend
+            extraction_breaker.cancel_trial()
+            raise
+        except Exception as e:
+            timed_out = isinstance(e, backend.timeout_errors)
+            transient = isinstance(e, backend.transient_errors)
+            if transient or timed_out:
+                extraction_breaker.record_failure()
+            else:
+                # A malformed request or a bad image fails the same on a healthy backend
+                extraction_breaker.cancel_trial()
+            pause = backoff(attempt)
+            if attempt >= settings.EXTRACTION_RETRIES or not transient \
+                    or time.monotonic() + pause >= deadline:
+                if timed_out:
+                    raise ExtractionTimeout(f"Generative ai error: timed out ({str(e)})") from e
+                raise ExtractionError(f"Generative ai error: {str(e)}") from e
+            logger.info("Retrying extraction after %s (attempt %d)", type(e).__name__, attempt + 1)
+            time.sleep(pause)
+            attempt += 1
+            continue
+        extraction_breaker.record_success()
+        return text, latency_ms
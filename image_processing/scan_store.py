@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+
+import PIL.Image
+from django.conf import settings
+
+from image_processing.models import PrescriptionScan
+
+
+class ScanStore:
+    """
+    Content-addressed scan files under SCAN_STORAGE_ROOT.
+
+    A scan lives at `<root>/ab/cd/<hash>.<ext>`, where `ab` and `cd` are the
+    first two byte pairs of its BLAKE2 hash, so no directory grows past a few
+    hundred entries. Files are written once through a temporary file and an
+    atomic rename; a scan that is already stored is never written again.
+    """
+
+    @property
+    def root(self):
+        return settings.SCAN_STORAGE_ROOT
+
+    @staticmethod
+    def relative_path(digest, extension):
+        return os.path.join(digest[:2], digest[2:4], f"{digest}.{extension}")
+
+    def save(self, digest, data):
+        """ Write `data` under its hash unless it is already there; returns the relative path. """
+        relative = self.relative_path(digest, _extension(data))
+        target = os.path.join(self.root, relative)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".scan-")
+            with os.fdopen(fd, "wb") as scan:
+                scan.write(data)
+            os.replace(temporary, target)
+        return relative
+
+    def read(self, relative_path):
+        with open(os.path.join(self.root, relative_path), "rb") as scan:
+            return scan.read()
+
+
+def _extension(data):
+    try:
+        image_format = PIL.Image.open(io.BytesIO(data)).format or "bin"
+    except Exception:
+        image_format = "bin"
+    return "jpg" if image_format == "JPEG" else image_format.lower()
+
+
+def store_scan(digest, data, user=None):
+    """ The PrescriptionScan for these bytes, storing the file and row the first time. """
+    relative = scan_store.save(digest, data)
+    scan, _ = PrescriptionScan.objects.get_or_create(
+        content_hash=digest, defaults={"path": relative, "size": len(data), "user_created": user}
+    )
+    return scan
+
+
+scan_store = ScanStore()
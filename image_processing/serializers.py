@@ -1,8 +1,14 @@
 from rest_framework import serializers
-from image_processing.models import PrescriptionRecord
+from image_processing.models import PrescriptionRecord, ExtractionJob
 
 
 class PrescriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PrescriptionRecord
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ExtractionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExtractionJob
+        exclude = ['image', 'locked_by']
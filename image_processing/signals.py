@@ -0,0 +1,35 @@
+from django.core.signals import request_started
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .jobs import worker_pool
+from .models import PrescriptionRecord
+from .prescription_stats import stat_key, adjust_stat
+
+
+# Web processes drain jobs left QUEUED or RUNNING by a restart without waiting for a new upload.
+# Management commands never serve requests, so migrate and friends start no threads.
+@receiver(request_started)
+def start_extraction_workers(sender, **kwargs):
+    worker_pool.start()
+
+
+# The rollup is written in the record's own transaction, so a rollback undoes both
+@receiver(pre_save, sender=PrescriptionRecord)
+def prescription_record_saving(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = PrescriptionRecord.objects.filter(pk=instance.pk).only("prescription_date", "gender", "type").first()
+    instance._previous_stat_key = stat_key(previous) if previous else None
+
+
+@receiver(post_save, sender=PrescriptionRecord)
+def prescription_record_saved(sender, instance, **kwargs):
+    previous, current = getattr(instance, "_previous_stat_key", None), stat_key(instance)
+    if previous != current:
+        adjust_stat(previous, -1)
+        adjust_stat(current, 1)
+
+
+@receiver(post_delete, sender=PrescriptionRecord)
+def prescription_record_deleted(sender, instance, **kwargs):
+    adjust_stat(stat_key(instance), -1)
@@ -1,3 +1,150 @@
-from django.test import TestCase # noqa
+from datetime import date
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from image_processing.models import PrescriptionDailyStat, PrescriptionRecord
+from image_processing.parsing import load_first_object
+from image_processing.prescription_stats import (
+    add_to_stats, daily_prescription_counts, daily_stat_counts, prescription_counts, rebuild_stats, stat_counts,
+)
+from users.models import Patient
+
+
+@skipUnless(connection.vendor in ("sqlite", "mysql"), "EXPLAIN output differs on this database")
+class PrescriptionRecordIndexTests(TestCase):
+    """
+    The dashboard and listing queries must stay on the PrescriptionRecord
+    indexes. SQLite reports the index it picks, MySQL at least lists it
+    among the possible keys.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        patient = Patient.objects.create(first_name="ravi", last_name="patil")
+        PrescriptionRecord.objects.bulk_create(
+            PrescriptionRecord(
+                patient=patient, patient_name=f"ravi patil {number}", prescription_date=date(2025, 1, number % 28 + 1),
+                gender="MF"[number % 2], type="ONL"[number % 3],
+            )
+            for number in range(50)
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used by:\n{plan}")
+
+    def test_date_range_counts(self):
+        queryset = PrescriptionRecord.objects.filter(prescription_date__range=[date(2025, 1, 1), date(2025, 1, 31)])
+        self.assertUsesIndex(queryset, "prescription_date_gender_type")
+        self.assertEqual(prescription_counts(queryset)["total_count"], 50)
+
+    def test_listing_order(self):
+        self.assertUsesIndex(PrescriptionRecord.objects.order_by("-date_updated", "-id"), "prescription_updated_id")
+
+    def test_type_listing(self):
+        self.assertUsesIndex(PrescriptionRecord.objects.filter(type="O").order_by("-date_updated"),
+                             "prescription_type_updated")
+
+    @skipUnless(connection.vendor == "mysql", "SQLite only indexes LIKE on NOCASE columns")
+    def test_patient_name_search(self):
+        self.assertUsesIndex(PrescriptionRecord.objects.filter(patient_name__startswith="ravi").order_by("-date_updated"),
+                             "prescription_name_updated")
+
+
+class LoadFirstObjectTests(SimpleTestCase):
+    """ The model wraps its JSON in prose and fences and sometimes gets cut off. """
+
+    def test_object_in_fenced_prose(self):
+        text = 'Here is the prescription:\n```json\n{"patient_name": "A", "complaints": ["fever"]}\n```'
+        self.assertEqual(load_first_object(text), ({"patient_name": "A", "complaints": ["fever"]}, []))
+
+    def test_braces_in_prose_before_the_object(self):
+        self.assertEqual(load_first_object('Note {see below}. {"patient_name": "A"}'), ({"patient_name": "A"}, []))
+        self.assertEqual(load_first_object('{x} {y: {z}} {"age": "40"}'), ({"age": "40"}, []))
+
+    def test_nested_object_of_a_malformed_one_is_not_returned(self):
+        with self.assertRaisesMessage(ValueError, "malformed"):
+            load_first_object('{"patient_name": {"first": "A"}, oops}')
+
+    def test_trailing_commas_are_removed(self):
+        value, issues = load_first_object('{"complaints": ["fever", "cough",],}')
+        self.assertEqual(value, {"complaints": ["fever", "cough"]})
+        self.assertEqual(issues, ["Removed trailing commas from the model output"])
+
+    def test_cut_off_object_is_closed(self):
+        value, issues = load_first_object('{"patient_name": "A", "complaints": ["fever", "cou')
+        self.assertEqual(value, {"patient_name": "A", "complaints": ["fever", "cou"]})
+        self.assertEqual(issues, ["Model output was cut off, the JSON object was closed automatically"])
+
+    def test_no_object(self):
+        with self.assertRaisesMessage(ValueError, "No JSON object"):
+            load_first_object("I could not read this prescription.")
+
+
+class PrescriptionDailyStatTests(TestCase):
+    """ getPrescriptionCount answers from the rollup, so it must always agree with the records. """
+
+    start, end = date(2025, 1, 1), date(2025, 1, 31)
+
+    def setUp(self):
+        self.patient = Patient.objects.create(first_name="ravi", last_name="patil")
+
+    def record(self, **fields):
+        return PrescriptionRecord.objects.create(patient=self.patient, patient_name="ravi patil", **fields)
+
+    def assertRollupMatches(self):
+        records = PrescriptionRecord.objects.filter(prescription_date__range=[self.start, self.end])
+        self.assertEqual(stat_counts(self.start, self.end), prescription_counts(records))
+        self.assertEqual(daily_stat_counts(self.start, self.end), daily_prescription_counts(records))
+        for filters in ({"gender": "F"}, {"type": "O"}, {"gender": "M", "type": "N"}):
+            with self.subTest(**filters):
+                self.assertEqual(stat_counts(self.start, self.end, **filters), prescription_counts(records.filter(**filters)))
+
+    def test_create(self):
+        self.record(prescription_date=date(2025, 1, 5), gender="M", type="N")
+        self.record(prescription_date="2025-01-05", gender="F", type="O")
+        self.record(prescription_date=None, gender="F", type="O")
+        self.assertEqual(stat_counts(self.start, self.end)["total_count"], 2)
+        self.assertRollupMatches()
+
+    def test_change_date_and_gender(self):
+        record = self.record(prescription_date=date(2025, 1, 5), gender="M", type="N")
+        record.prescription_date = date(2025, 1, 20)
+        record.save()
+        self.assertRollupMatches()
+        record.gender = "F"
+        record.save()
+        self.assertRollupMatches()
+        record.prescription_date = None
+        record.save()
+        self.assertEqual(stat_counts(self.start, self.end)["total_count"], 0)
+        self.assertRollupMatches()
+
+    def test_delete(self):
+        record = self.record(prescription_date=date(2025, 1, 5), gender="M", type="N")
+        self.record(prescription_date=date(2025, 1, 5), gender="M", type="N")
+        record.delete()
+        self.assertEqual(stat_counts(self.start, self.end)["total_count"], 1)
+        self.assertRollupMatches()
+
+    def test_bulk_insert(self):
+        records = PrescriptionRecord.objects.bulk_create(
+            PrescriptionRecord(
+                patient=self.patient, patient_name="ravi patil", prescription_date=date(2025, 1, number % 28 + 1),
+                gender="MF"[number % 2], type="ON"[number % 2],
+            )
+            for number in range(30)
+        )
+        add_to_stats(records)
+        self.assertRollupMatches()
+
+    def test_rebuild(self):
+        self.record(prescription_date=date(2025, 1, 5), gender="M", type="N")
+        self.record(prescription_date=date(2025, 1, 6), gender="F", type="O")
+        # Writes that skip the signals leave the rollup behind until it is rebuilt
+        PrescriptionRecord.objects.filter(gender="M").update(gender="F")
+        PrescriptionDailyStat.objects.filter(date=date(2025, 1, 6)).delete()
+        rebuild_stats(date(2025, 1, 1), date(2025, 1, 10))
+        self.assertRollupMatches()
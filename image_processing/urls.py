@@ -1,7 +1,8 @@
 from django.urls import path
-from image_processing.views import ImageProcessingAPI, PrescriptionAPI
+from image_processing.views import ImageProcessingAPI, BatchImageProcessingAPI, PrescriptionAPI
 
 urlpatterns = [
     path('', PrescriptionAPI.as_view(), name='prescription'),
     path('imageprocess/', ImageProcessingAPI.as_view(), name='imageprocess'),
+    path('imageprocess/batch/', BatchImageProcessingAPI.as_view(), name='imageprocess-batch'),
 ]
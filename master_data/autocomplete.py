@@ -0,0 +1,65 @@
+import threading
+from bisect import bisect_left
+
+from .medicine_index import catalog_version
+from .models import MedicineData, GenericName
+
+
+class AutocompleteIndex:
+    """
+    Sorted array of medicine and generic names for prefix lookups.
+
+    A prefix search is one bisect into the case-folded keys followed by a
+    short forward walk. Completing a keystroke touches the database for at
+    most one primary key lookup of the catalog version, every
+    SPELL_CHECK_CATALOG_PROBE_SECONDS; the arrays are rebuilt lazily once it
+    moves, whichever worker changed the catalog.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None
+        self._items = None
+        self._version = None
+
+    def _build(self):
+        items = []
+        medicines = MedicineData.objects.values_list("id", "name", "generic_name__name", "medicine_type__name")
+        for pk, name, generic_name, medicine_type in medicines:
+            items.append((name.casefold(), 0, pk, {
+                "type": "medicine",
+                "id": pk,
+                "name": name,
+                "generic_name": generic_name,
+                "medicine_type": medicine_type,
+            }))
+        for pk, name in GenericName.objects.values_list("id", "name"):
+            items.append((name.casefold(), 1, pk, {"type": "generic_name", "id": pk, "name": name}))
+        items.sort(key=lambda item: item[:3])
+        return [item[0] for item in items], [item[3] for item in items]
+
+    def _arrays(self):
+        version = catalog_version.current()
+        with self._lock:
+            if self._keys is None or self._version != version:
+                self._keys, self._items = self._build()
+                self._version = version
+            return self._keys, self._items
+
+    def complete(self, prefix, limit=10):
+        """ Up to `limit` medicines and generic names starting with `prefix`, alphabetically. """
+        keys, items = self._arrays()
+        prefix = prefix.casefold()
+        matches = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if len(matches) >= limit or not keys[position].startswith(prefix):
+                break
+            matches.append(items[position])
+        return matches
+
+    def invalidate(self):
+        """ Re-read the catalog version on the next lookup, which rebuilds the arrays if it moved. """
+        catalog_version.expire()
+
+
+autocomplete_index = AutocompleteIndex()
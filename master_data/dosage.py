@@ -0,0 +1,59 @@
+import re
+from collections import namedtuple
+
+
+# Prescription abbreviations mapped to a canonical dosage form
+DOSAGE_FORMS = {
+    "tab": "tablet", "tabs": "tablet", "tablet": "tablet", "tablets": "tablet",
+    "cap": "capsule", "caps": "capsule", "capsule": "capsule", "capsules": "capsule",
+    "syp": "syrup", "syr": "syrup", "syrup": "syrup",
+    "susp": "suspension", "suspension": "suspension",
+    "inj": "injection", "injection": "injection",
+    "oint": "ointment", "ointment": "ointment",
+    "crm": "cream", "cream": "cream",
+    "gel": "gel",
+    "lot": "lotion", "lotion": "lotion",
+    "drop": "drops", "drops": "drops", "gtt": "drops",
+    "sach": "sachet", "sachet": "sachet",
+    "pwd": "powder", "powder": "powder",
+    "inh": "inhaler", "inhaler": "inhaler",
+    "neb": "nebuliser", "resp": "nebuliser", "respule": "nebuliser", "respules": "nebuliser",
+}
+
+_PREFIX = re.compile(r"^\s*(%s)\b\.?\s*" % "|".join(sorted(DOSAGE_FORMS, key=len, reverse=True)), re.IGNORECASE)
+_STRENGTH = re.compile(
+    r"[\s-]*(\d+(?:\.\d+)?\s*(?:mg|mcg|gm|g|ml|iu|%)?(?:\s*/\s*\d+(?:\.\d+)?\s*(?:mg|mcg|gm|g|ml|iu|%)?)*)\s*$",
+    re.IGNORECASE
+)
+
+ParsedMedicine = namedtuple("ParsedMedicine", ["name", "core", "dosage_form", "strength"])
+
+
+def canonical_dosage_form(text):
+    """ Canonical dosage form for a prefix or MedicineType name, None when unknown. """
+    if not text:
+        return None
+    return DOSAGE_FORMS.get(text.strip().rstrip(".").lower())
+
+
+def parse_medicine_text(text):
+    """
+    Split OCR text such as "Tab. Paracetamol 500mg" into the name without the
+    dosage-form prefix ("Paracetamol 500mg"), the bare core name
+    ("Paracetamol"), the dosage form ("tablet") and the strength ("500mg").
+    """
+    dosage_form = None
+    prefix = _PREFIX.match(text)
+    if prefix:
+        dosage_form = DOSAGE_FORMS[prefix.group(1).lower()]
+        text = text[prefix.end():]
+    name = text.strip()
+
+    strength = None
+    suffix = _STRENGTH.search(name)
+    if suffix and suffix.start() > 0:
+        strength = suffix.group(1).replace(" ", "")
+        core = name[:suffix.start()].strip()
+    else:
+        core = name
+    return ParsedMedicine(name, core, dosage_form, strength)
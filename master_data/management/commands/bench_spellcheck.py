@@ -0,0 +1,87 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from master_data.medicine_index import IndexSnapshot, MedicineEntry
+from master_data.phonetics import phonetic_key
+from master_data.spell_check import correct_medicines
+
+
+SYLLABLES = [
+    "a", "am", "ox", "i", "cil", "lin", "par", "ce", "ta", "mol", "do", "lo", "cro", "cin", "az", "ith",
+    "ro", "my", "met", "for", "min", "pan", "to", "pra", "zol", "ce", "fix", "ime", "lev", "o", "flox",
+    "ator", "va", "sta", "tin", "cal", "pol", "di", "clo", "fe", "nac", "ran", "ti", "dine", "mon", "te",
+]
+SUFFIXES = ["", " 250", " 500", " 650", " Forte", " Plus", " DS", " SR", " MR", " XL"]
+
+
+def make_catalog(size, rng):
+    names = set()
+    while len(names) < size:
+        stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        names.add(stem.capitalize() + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def misspell(name, rng):
+    """ One or two OCR-style edits: drop, double or swap a character. """
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        edit = rng.choice(["drop", "double", "swap"])
+        if edit == "drop" and len(chars) > 3:
+            del chars[i]
+        elif edit == "double":
+            chars.insert(i, chars[i])
+        elif i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+class Command(BaseCommand):
+    help = "Benchmark spell-check latency with and without the trigram pre-filter on synthetic catalogs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--prescriptions", type=int, default=20, help="Prescriptions scored per size")
+        parser.add_argument("--medicines", type=int, default=10, help="Medicines per prescription")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(f"{'names':>8} {'build ms':>9} {'brute ms':>9} {'indexed ms':>11} {'speedup':>8} {'agree':>6}")
+
+        for size in options["sizes"]:
+            names = make_catalog(size, rng)
+            snapshot = IndexSnapshot(MedicineEntry(i, name, 0, "", 0, "", phonetic_key(name), "") for i, name in enumerate(names))
+            prescriptions = [
+                {str(k): misspell(rng.choice(names), rng) for k in range(options["medicines"])}
+                for _ in range(options["prescriptions"])
+            ]
+
+            started = time.perf_counter()
+            snapshot.trigram_index
+            build_ms = (time.perf_counter() - started) * 1000
+
+            with override_settings(SPELL_CHECK_NGRAM_MIN_CATALOG=size + 1):
+                brute_ms, brute = self.run(prescriptions, snapshot)
+            with override_settings(SPELL_CHECK_NGRAM_MIN_CATALOG=0):
+                indexed_ms, indexed = self.run(prescriptions, snapshot)
+
+            same = sum(b == i for prescription_b, prescription_i in zip(brute, indexed)
+                       for b, i in zip(prescription_b.values(), prescription_i.values()))
+            total = len(prescriptions) * options["medicines"]
+            self.stdout.write(
+                f"{size:>8} {build_ms:>9.1f} {brute_ms:>9.2f} {indexed_ms:>11.2f} "
+                f"{brute_ms / indexed_ms:>7.1f}x {same / total:>6.1%}"
+            )
+
+    def run(self, prescriptions, snapshot):
+        """ Mean latency per prescription in milliseconds, and the corrections. """
+        results = []
+        started = time.perf_counter()
+        for prescription in prescriptions:
+            results.append(correct_medicines(prescription, snapshot))
+        return (time.perf_counter() - started) * 1000 / len(prescriptions), results
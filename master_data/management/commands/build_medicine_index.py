@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from master_data.shared_index import SharedMedicineIndex
+
+
+class Command(BaseCommand):
+    help = "Build the shared memory-mapped medicine index so workers start with it warm."
+
+    def handle(self, *args, **options):
+        if not settings.SPELL_CHECK_SHARED_INDEX:
+            self.stdout.write("SPELL_CHECK_SHARED_INDEX is off, no shared medicine index to build")
+            return
+        index = SharedMedicineIndex(settings.SPELL_CHECK_SHARED_INDEX_PATH)
+        version = index.rebuild()
+        snapshot = index.snapshot()
+        self.stdout.write(f"Medicine index v{version}: {len(snapshot)} names at {index.path}")
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import namedtuple
+from functools import cached_property
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import CatalogVersion, MedicineData
+from .ngram_index import TrigramIndex
+
+
+MedicineEntry = namedtuple(
+    "MedicineEntry",
+    [
+        "id", "name", "generic_name_id", "generic_name", "medicine_type_id", "medicine_type",
+        "phonetic_key", "generic_phonetic_key",
+    ]
+)
+
+
+def load_entries(**filters):
+    """
+    Read the catalog, or only the medicines matching `filters`, joined with
+    their generic names and types, in one query.
+    """
+    rows = MedicineData.objects.filter(**filters).order_by("id").values_list(
+        "id", "name", "generic_name_id", "generic_name__name", "medicine_type_id", "medicine_type__name",
+        "phonetic_key", "generic_name__phonetic_key",
+    )
+    return [MedicineEntry(*row) for row in rows]
+
+
+CATALOG_VERSION_ID = 1
+
+
+def fetch_catalog_version():
+    """ The catalog version counter, read with one primary key lookup. """
+    return CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values_list("version", flat=True).first() or 0
+
+
+def bump_catalog_version():
+    """
+    Move the catalog version on and return the new value. Called inside the
+    transaction of the change, whose lock on the counter row keeps versions
+    in commit order. Writes that bypass the model signals, such as bulk
+    imports, have to call it themselves.
+    """
+    with transaction.atomic():
+        if not CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).update(version=F("version") + 1):
+            # The migration creates the row, this only covers a table emptied by hand
+            CatalogVersion.objects.create(pk=CATALOG_VERSION_ID, version=1)
+        return fetch_catalog_version()
+
+
+class CatalogVersionCache:
+    """
+    fetch_catalog_version(), re-read at most every
+    SPELL_CHECK_CATALOG_PROBE_SECONDS per process. Catalog changes made in
+    this process expire it straight away, see master_data.signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._probed_at = 0.0
+
+    def current(self):
+        with self._lock:
+            if self._version is None or time.monotonic() - self._probed_at >= settings.SPELL_CHECK_CATALOG_PROBE_SECONDS:
+                self._version = fetch_catalog_version()
+                self._probed_at = time.monotonic()
+            return self._version
+
+    def expire(self):
+        with self._lock:
+            self._version = None
+
+
+catalog_version = CatalogVersionCache()
+
+
+class IndexSnapshot:
+    """
+    Immutable view of the catalog, `names[i]` belongs to `entries[i]`.
+    `version` is the catalog version it was loaded at, None for ad hoc
+    snapshots such as the benchmark's.
+    """
+
+    def __init__(self, entries, version=None):
+        self.entries = tuple(entries)
+        self.names = tuple(entry.name for entry in self.entries)
+        self.version = version
+
+    def __len__(self):
+        return len(self.entries)
+
+    @cached_property
+    def trigram_index(self):
+        # Built on first use, small catalogs are brute-forced and never need it
+        return TrigramIndex.build(self.names)
+
+    @cached_property
+    def generic_positions(self):
+        """ Distinct generic names mapped to the catalog positions that carry them. """
+        positions = {}
+        for position, entry in enumerate(self.entries):
+            positions.setdefault(entry.generic_name, []).append(position)
+        return positions
+
+    @cached_property
+    def generic_names(self):
+        return tuple(self.generic_positions)
+
+    @cached_property
+    def phonetic_keys(self):
+        return tuple(entry.phonetic_key for entry in self.entries)
+
+    @cached_property
+    def generic_phonetic_keys(self):
+        """ Phonetic key of each of `generic_names`, in the same order. """
+        keys = {}
+        for entry in self.entries:
+            keys.setdefault(entry.generic_name, entry.generic_phonetic_key)
+        return tuple(keys[name] for name in self.generic_names)
+
+
+class MedicineNameIndex:
+    """
+    Process-level copy of the MedicineData catalog used by the spell checker.
+
+    The catalog is read from the database on first use. Changes committed in
+    this process are applied row by row through invalidate(); a change made
+    by another worker shows up as a catalog version this copy has not seen
+    and reloads it. Checking the version costs one primary key lookup at
+    most every SPELL_CHECK_CATALOG_PROBE_SECONDS, never a catalog scan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._version = None
+        self._snapshot = None
+
+    def snapshot(self):
+        """ Return the current catalog snapshot shared by every request. """
+        # Read before loading, so a change racing the load only triggers one more reload
+        version = catalog_version.current()
+        with self._lock:
+            if self._entries is None or self._version != version:
+                self._entries = {entry.id: entry for entry in load_entries()}
+                self._version = version
+                self._snapshot = None
+            if self._snapshot is None:
+                self._snapshot = IndexSnapshot((self._entries[pk] for pk in sorted(self._entries)), self._version)
+            return self._snapshot
+
+    def names(self):
+        return self.snapshot().names
+
+    def invalidate(self, version=None, **rows):
+        """
+        This process committed catalog `version`, changing the medicines
+        matching `rows`, e.g. `id=pk` or `generic_name_id=pk`. When the copy
+        was at the version just before, only those medicines are read again;
+        otherwise the next snapshot() reloads the catalog.
+        """
+        with self._lock:
+            if self._entries is not None and rows and version is not None and self._version == version - 1:
+                for pk in [pk for pk, entry in self._entries.items()
+                           if all(getattr(entry, field) == value for field, value in rows.items())]:
+                    del self._entries[pk]
+                self._entries.update((entry.id, entry) for entry in load_entries(**rows))
+                self._version = version
+                self._snapshot = None
+        catalog_version.expire()
+
+
+def _create_index():
+    if settings.SPELL_CHECK_SHARED_INDEX:
+        from .shared_index import SharedMedicineIndex
+        return SharedMedicineIndex(settings.SPELL_CHECK_SHARED_INDEX_PATH)
+    return MedicineNameIndex()
+
+
+medicine_index = _create_index()
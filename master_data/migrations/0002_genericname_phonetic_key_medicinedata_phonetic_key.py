@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+from master_data.phonetics import phonetic_key
+
+
+def fill_phonetic_keys(apps, schema_editor):
+    for model_name in ("GenericName", "MedicineData"):
+        model = apps.get_model("master_data", model_name)
+        rows = list(model.objects.only("id", "name"))
+        for row in rows:
+            row.phonetic_key = phonetic_key(row.name)
+        model.objects.bulk_update(rows, ["phonetic_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master_data', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genericname',
+            name='phonetic_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Phonetic Key'),
+        ),
+        migrations.AddField(
+            model_name='medicinedata',
+            name='phonetic_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Phonetic Key'),
+        ),
+        migrations.RunPython(fill_phonetic_keys, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from .phonetics import phonetic_key
 
 # Create your models here.
 
@@ -33,6 +34,13 @@ class GenericName(models.Model):
         verbose_name="Generic Name"
     )
 
+    phonetic_key = models.CharField(
+        max_length=100,
+        verbose_name="Phonetic Key",
+        blank=True,
+        editable=False
+    )
+
     date_created = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Date Created"
@@ -50,6 +58,10 @@ class GenericName(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.phonetic_key = phonetic_key(self.name)
+        super().save(*args, **kwargs)
+
 
 class MedicineData(models.Model):
     name = models.CharField(
@@ -57,6 +69,13 @@ class MedicineData(models.Model):
         verbose_name="Medicine Name"
     )
 
+    phonetic_key = models.CharField(
+        max_length=100,
+        verbose_name="Phonetic Key",
+        blank=True,
+        editable=False
+    )
+
     price = models.CharField(
         max_length=30,
         verbose_name="Price",
@@ -98,3 +117,28 @@ class MedicineData(models.Model):
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.phonetic_key = phonetic_key(self.name)
+        super().save(*args, **kwargs)
+
+
+class CatalogVersion(models.Model):
+    """
+    Single row counting catalog changes. master_data.signals bumps it in the
+    transaction of every MedicineData, GenericName and MedicineType change,
+    so a worker can tell its copy of the catalog is stale with one primary
+    key lookup.
+    """
+    version = models.PositiveBigIntegerField(
+        verbose_name="Version",
+        default=0
+    )
+
+    class Meta:
+        db_table = "CatalogVersion"
+        verbose_name = "Catalog Version"
+        verbose_name_plural = "Catalog Version"
+
+    def __str__(self):
+        return str(self.version)
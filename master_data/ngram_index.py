@@ -0,0 +1,88 @@
+import re
+
+import numpy as np
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name):
+    """ Lower-case a medicine name and collapse punctuation and spacing. """
+    return _NON_ALNUM.sub(" ", name.casefold()).strip()
+
+
+def trigram_keys(name):
+    """ Distinct character trigrams of the normalized name, packed into integers. """
+    padded = f"  {normalize_name(name)} "
+    return {
+        (ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+        for i in range(len(padded) - 2)
+    }
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over the catalog names.
+
+    Postings are stored CSR style: `keys` is the sorted array of distinct
+    trigrams and the catalog positions containing `keys[i]` are
+    `postings[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, keys, offsets, postings, sizes):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self.sizes = sizes  # Number of distinct trigrams per catalog name
+
+    @classmethod
+    def build(cls, names):
+        all_keys, all_positions = [], []
+        sizes = np.zeros(len(names), dtype=np.int32)
+        for position, name in enumerate(names):
+            keys = trigram_keys(name)
+            sizes[position] = len(keys)
+            all_keys.extend(keys)
+            all_positions.extend([position] * len(keys))
+
+        all_keys = np.array(all_keys, dtype=np.int64)
+        order = np.argsort(all_keys, kind="stable")
+        keys, starts = np.unique(all_keys[order], return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+        postings = np.array(all_positions, dtype=np.int32)[order]
+        return cls(keys, offsets, postings, sizes)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def shortlist(self, query, limit):
+        """
+        Catalog positions of the `limit` names sharing the most trigrams with
+        `query` relative to their size (Jaccard), best first.
+        """
+        query_keys = np.fromiter(trigram_keys(query), dtype=np.int64)
+        if not len(query_keys) or not len(self.keys):
+            return np.empty(0, dtype=np.int32)
+
+        slots = np.searchsorted(self.keys, query_keys)
+        found = slots < len(self.keys)
+        found[found] = self.keys[slots[found]] == query_keys[found]
+        slots = slots[found]
+        if not len(slots):
+            return np.empty(0, dtype=np.int32)
+
+        hits = np.concatenate([self.postings[self.offsets[s]:self.offsets[s + 1]] for s in slots])
+        candidates, shared = np.unique(hits, return_counts=True)
+        similarity = shared / (len(query_keys) + self.sizes[candidates] - shared)
+
+        if len(candidates) > limit:
+            best = np.argpartition(-similarity, limit - 1)[:limit]
+            candidates, similarity = candidates[best], similarity[best]
+        return candidates[np.argsort(-similarity, kind="stable")]
+
+    def shortlist_many(self, queries, limit):
+        """ Sorted union of the shortlists of every query. """
+        shortlists = [self.shortlist(query, limit) for query in queries]
+        if not shortlists:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(shortlists))
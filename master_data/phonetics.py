@@ -0,0 +1,44 @@
+import re
+
+
+# Spelling variants that sound alike, applied in order
+_REWRITES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"(?<=[a-z])h"), ""),
+    (re.compile(r"ae|oe"), "e"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"dg(?=[eiy])"), "j"),
+    (re.compile(r"ck|ch|q"), "k"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"g(?=[eiy])"), "j"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"w"), "v"),
+]
+_NON_LETTER = re.compile(r"[^a-z]+")
+_DOUBLES = re.compile(r"(.)\1+")
+_VOWELS = re.compile(r"[aeiou]")
+
+
+def phonetic_key(name):
+    """
+    Metaphone-style sound key for a drug name, so common handwriting and OCR
+    misspellings collide: "Amoxycilin" and "Amoxicillin" both give "AMKSLN".
+
+    Each word keeps its first letter (a leading vowel becomes "A"), drops
+    the remaining vowels and collapses repeated consonants. Digits such as
+    strengths are ignored.
+    """
+    keys = []
+    for word in _NON_LETTER.split(name.casefold()):
+        if not word:
+            continue
+        for pattern, replacement in _REWRITES:
+            word = pattern.sub(replacement, word)
+        word = _DOUBLES.sub(r"\1", word)
+        if not word:
+            continue
+        head = "a" if word[0] in "aeiou" else word[0]
+        keys.append(_DOUBLES.sub(r"\1", head + _VOWELS.sub("", word[1:])).upper())
+    return " ".join(keys)
@@ -0,0 +1,277 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.db import connection
+
+from .medicine_index import IndexSnapshot, MedicineEntry, load_entries, catalog_version, fetch_catalog_version
+from .ngram_index import TrigramIndex
+
+
+MAGIC = b"MEDIDX04"
+ID_COLUMNS = ("id", "generic_name_id", "medicine_type_id")
+STRING_COLUMNS = ("name", "generic_name", "medicine_type", "phonetic_key", "generic_phonetic_key")
+# magic, counter, entries, trigram keys, trigram postings, catalog version, then the byte size of each string pool
+HEADER = struct.Struct("<8s5Q%dQ" % len(STRING_COLUMNS))
+COUNTER = struct.Struct("<Q")
+
+logger = logging.getLogger(__name__)
+
+
+def _padding(size):
+    return b"\0" * (-size % 8)
+
+
+def write_index(path, entries, counter, catalog=0):
+    """
+    Serialize the catalog and its trigram index into one flat, 8-byte aligned
+    blob at `path`, labelled with the rebuild `counter` and the `catalog`
+    version the entries were read at. The file is written next to the target
+    and renamed over it, so readers only ever map a complete index.
+    """
+    snapshot = IndexSnapshot(entries)
+    trigrams = snapshot.trigram_index
+
+    sections = [
+        np.array([getattr(entry, column) for entry in snapshot.entries], dtype=np.int64)
+        for column in ID_COLUMNS
+    ]
+    pool_sizes = []
+    for column in STRING_COLUMNS:
+        encoded = [getattr(entry, column).encode() for entry in snapshot.entries]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+        pool = b"".join(encoded)
+        pool_sizes.append(len(pool))
+        sections += [offsets, pool]
+    sections += [
+        trigrams.keys.astype(np.int64),
+        trigrams.offsets.astype(np.int64),
+        trigrams.postings.astype(np.int32),
+        trigrams.sizes.astype(np.int32),
+    ]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as blob:
+        blob.write(HEADER.pack(
+            MAGIC, counter, len(snapshot), len(trigrams.keys), len(trigrams.postings), catalog, *pool_sizes
+        ))
+        for section in sections:
+            data = section.tobytes() if isinstance(section, np.ndarray) else section
+            blob.write(data)
+            blob.write(_padding(len(data)))
+        blob.flush()
+        os.fsync(blob.fileno())
+    os.replace(temporary, path)
+
+
+class _MappedEntries(Sequence):
+    """ MedicineEntry rows decoded from the mapped blob on access. """
+
+    def __init__(self, ids, strings):
+        self._ids = ids
+        self._strings = strings
+
+    def __len__(self):
+        return len(self._ids["id"])
+
+    def __getitem__(self, position):
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        values = {column: int(array[position]) for column, array in self._ids.items()}
+        values.update((column, strings.get(position)) for column, strings in self._strings.items())
+        return MedicineEntry(**values)
+
+
+class _MappedStrings:
+    def __init__(self, buffer, offsets, start):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._start = start
+
+    def get(self, position):
+        begin = self._start + int(self._offsets[position])
+        end = self._start + int(self._offsets[position + 1])
+        return self._buffer[begin:end].decode()
+
+    def decode_all(self):
+        return tuple(self.get(position) for position in range(len(self._offsets) - 1))
+
+
+class MappedIndexSnapshot(IndexSnapshot):
+    """
+    Catalog snapshot backed by a read-only memory map of a write_index blob.
+
+    The numeric columns and the trigram index are zero-copy views of the
+    mapping, so every worker shares the same physical pages. Only the
+    medicine names and their phonetic keys are decoded per process, because
+    rapidfuzz needs them as Python strings.
+
+    `counter` is the rebuild it came from, `version` the catalog version its
+    entries were read at.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as blob:
+            self._buffer = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.counter, count, key_count, posting_count, self.version, *pool_sizes = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a medicine index")
+
+        self._position = HEADER.size
+        ids = {column: self._array(np.int64, count) for column in ID_COLUMNS}
+        strings = {}
+        for column, pool_size in zip(STRING_COLUMNS, pool_sizes):
+            offsets = self._array(np.int64, count + 1)
+            strings[column] = _MappedStrings(self._buffer, offsets, self._position)
+            self._position += pool_size + len(_padding(pool_size))
+
+        self.names = strings["name"].decode_all()
+        self.phonetic_keys = strings["phonetic_key"].decode_all()
+        self.entries = _MappedEntries(ids, strings)
+        self.trigram_index = TrigramIndex(
+            self._array(np.int64, key_count),
+            self._array(np.int64, key_count + 1),
+            self._array(np.int32, posting_count),
+            self._array(np.int32, count),
+        )
+
+    def _array(self, dtype, length):
+        array = np.frombuffer(self._buffer, dtype=dtype, count=length, offset=self._position)
+        self._position += array.nbytes + len(_padding(array.nbytes))
+        return array
+
+
+def read_catalog_version(path):
+    """ Catalog version of the blob at `path`, or None when there is no readable blob. """
+    try:
+        with open(path, "rb") as blob:
+            header = blob.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, _, _, _, _, catalog, *_ = HEADER.unpack(header)
+            return catalog if magic == MAGIC else None
+    except FileNotFoundError:
+        return None
+
+
+class SharedMedicineIndex:
+    """
+    Medicine index shared by every worker process on the host.
+
+    The catalog is serialized once into a blob at `path` that each worker
+    maps read-only. `<path>.version` holds a counter that is bumped after
+    every rebuild; workers watch it through their own mapping and reopen
+    the blob only when it has moved past the counter they loaded.
+
+    Catalog changes coming in through master_data.signals rebuild the blob
+    on a background thread of the worker that made the change, serialized
+    across processes with a flock on `<path>.lock`. A worker that finds the
+    catalog version ahead of the blob, e.g. after a change on another host
+    or a failed rebuild, schedules one as well.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._counter = None
+        self._rebuild_pending = False
+        self._requested_version = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="medicine-index")
+
+    def _version(self):
+        if self._counter is None:
+            # The counter file only gets its 8 bytes once the first blob is complete
+            if not os.path.exists(f"{self.path}.version") or os.path.getsize(f"{self.path}.version") < COUNTER.size:
+                return 0
+            with open(f"{self.path}.version", "rb") as counter:
+                self._counter = mmap.mmap(counter.fileno(), COUNTER.size, access=mmap.ACCESS_READ)
+        return COUNTER.unpack_from(self._counter)[0]
+
+    def _map(self):
+        try:
+            return MappedIndexSnapshot(self.path)
+        except ValueError:
+            # A blob in an older format, left behind by the previous release
+            self.rebuild()
+            return MappedIndexSnapshot(self.path)
+
+    def snapshot(self):
+        """ Return the current catalog snapshot, remapping only when the counter moved. """
+        current = catalog_version.current()
+        with self._lock:
+            counter = self._version()
+            if counter == 0:
+                # Fresh host: the first worker to get here builds the blob for everyone
+                self.rebuild(only_if_older_than=1)
+                counter = self._version()
+            if self._snapshot is None or self._snapshot.counter < counter:
+                self._snapshot = self._map()
+            snapshot = self._snapshot
+            stale = snapshot.version != current and self._requested_version != current
+            if stale:
+                self._requested_version = current
+        if stale:
+            self._schedule_rebuild()
+        return snapshot
+
+    def names(self):
+        return self.snapshot().names
+
+    def rebuild(self, only_if_older_than=None, only_if_changed=False):
+        """
+        Write a fresh blob from the database and bump the version counter.
+        With `only_if_changed`, a blob already at the current catalog version
+        is kept. Returns the counter now on disk.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                counter_fd = os.open(f"{self.path}.version", os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    current = COUNTER.unpack(os.pread(counter_fd, COUNTER.size, 0).ljust(COUNTER.size, b"\0"))[0]
+                    if only_if_older_than is not None and current >= only_if_older_than:
+                        return current
+                    # Probed before reading the entries, so a racing change only costs one more rebuild
+                    catalog = fetch_catalog_version()
+                    if only_if_changed and current and read_catalog_version(self.path) == catalog:
+                        return current
+                    write_index(self.path, load_entries(), current + 1, catalog)
+                    os.pwrite(counter_fd, COUNTER.pack(current + 1), 0)
+                    return current + 1
+                finally:
+                    os.close(counter_fd)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _schedule_rebuild(self):
+        # Changes arriving while a rebuild is queued are covered by that rebuild
+        with self._lock:
+            if self._rebuild_pending:
+                return
+            self._rebuild_pending = True
+        self._executor.submit(self._scheduled_rebuild)
+
+    def _scheduled_rebuild(self):
+        with self._lock:
+            self._rebuild_pending = False
+        try:
+            self.rebuild(only_if_changed=True)
+        except Exception:
+            # Nobody waits on this thread, so the log is the only trace of an index left behind
+            logger.exception("Rebuilding the medicine index at %s failed, workers keep the previous one", self.path)
+        finally:
+            connection.close()
+
+    def invalidate(self, version=None, **rows):
+        """ Same hook as MedicineNameIndex.invalidate(), the blob is always rebuilt whole. """
+        self._schedule_rebuild()
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import MedicineData, GenericName, MedicineType
+from .medicine_index import medicine_index, bump_catalog_version
+from .autocomplete import autocomplete_index
+
+
+# The catalog version moves inside the saving transaction, so a rolled back save never moves it,
+# and the indexes of this process catch up once the change commits.
+# Spell-check cache entries are keyed on the catalog version and need no clearing.
+def catalog_changed(**rows):
+    version = bump_catalog_version()
+    transaction.on_commit(lambda: medicine_index.invalidate(version, **rows))
+    transaction.on_commit(autocomplete_index.invalidate)
+
+
+@receiver(post_save, sender=MedicineData)
+def medicine_data_saved(sender, instance, **kwargs):
+    catalog_changed(id=instance.pk)
+
+
+@receiver(post_delete, sender=MedicineData)
+def medicine_data_deleted(sender, instance, **kwargs):
+    catalog_changed(id=instance.pk)
+
+
+@receiver(post_save, sender=GenericName)
+def generic_name_saved(sender, instance, **kwargs):
+    # A new generic name only shows up in autocomplete, no medicine carries it yet
+    catalog_changed(generic_name_id=instance.pk)
+
+
+@receiver(post_save, sender=MedicineType)
+def medicine_type_saved(sender, instance, created, **kwargs):
+    if not created:
+        catalog_changed(medicine_type_id=instance.pk)
+
+
+@receiver(post_delete, sender=GenericName)
+def generic_name_deleted(sender, instance, **kwargs):
+    catalog_changed(generic_name_id=instance.pk)
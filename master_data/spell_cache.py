@@ -0,0 +1,85 @@
+import hashlib
+import re
+import threading
+
+from django.core.cache import caches
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text):
+    """ OCR output differs mostly in stray spacing, which never changes the answer. """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class SpellCheckCache:
+    """
+    Per-medicine spell-check results stored in the "spell_check" cache alias.
+
+    Entries are keyed on the catalog version of the snapshot they were
+    scored against, the mode, its parameters and the normalized input text,
+    so a recurring misreading is scored once and then served from the cache
+    until the TTL expires or the backend culls it. A catalog change moves
+    the version, which retires every older entry in every worker at once,
+    and results scored on an older snapshot can never be filed under a newer
+    catalog.
+    """
+
+    alias = "spell_check"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, version, mode, params, text):
+        catalog = hashlib.blake2b(str(version).encode(), digest_size=8).hexdigest()
+        digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        options = ":".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"spellcheck:{catalog}:{mode}:{options}:{digest}"
+
+    def run(self, corrector, mode, extracted_medicines, snapshot, **params):
+        """
+        Same result as `corrector(extracted_medicines, snapshot, **params)`,
+        scoring only the normalized inputs that are not cached yet.
+        """
+        texts = {key: normalize_input(value) for key, value in extracted_medicines.items() if isinstance(value, str)}
+        cache_keys = {text: self._key(snapshot.version, mode, params, text) for text in set(texts.values())}
+        cached = self.cache.get_many(cache_keys.values())
+
+        results = {text: cached[cache_key] for text, cache_key in cache_keys.items() if cache_key in cached}
+        missing = [text for text in cache_keys if text not in results]
+        if missing:
+            computed = corrector({text: text for text in missing}, snapshot, **params)
+            self.cache.set_many({cache_keys[text]: computed[text] for text in missing})
+            results.update(computed)
+
+        with self._lock:
+            self.hits += len(cache_keys) - len(missing)
+            self.misses += len(missing)
+
+        corrected = {}
+        for key, value in extracted_medicines.items():
+            if key in texts:
+                corrected[key] = results[texts[key]]
+            else:
+                # Non-text values never reach the scorer, the corrector answers them directly
+                corrected[key] = corrector({key: value}, snapshot, **params)[key]
+        return corrected
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+spell_check_cache = SpellCheckCache()
@@ -0,0 +1,211 @@
+import numpy as np
+from django.conf import settings
+from rapidfuzz import process, fuzz
+from .dosage import canonical_dosage_form, parse_medicine_text
+from .phonetics import phonetic_key
+
+
+def _unique_queries(extracted_medicines):
+    return list({medicine for medicine in extracted_medicines.values() if isinstance(medicine, str)})
+
+
+def _candidate_positions(queries, snapshot):
+    """
+    Catalog positions worth scoring for `queries`. Large catalogs are first
+    narrowed down with the trigram index, small ones are scored in full.
+    """
+    if len(snapshot) < settings.SPELL_CHECK_NGRAM_MIN_CATALOG:
+        return np.arange(len(snapshot))
+    return snapshot.trigram_index.shortlist_many(queries, settings.SPELL_CHECK_NGRAM_SHORTLIST)
+
+
+def _cdist(queries, choices):
+    return process.cdist(
+        queries, choices,
+        scorer=fuzz.ratio,
+        dtype=np.float64,
+        workers=settings.SPELL_CHECK_WORKERS
+    )
+
+
+def _with_phonetics(scores, queries, choice_keys):
+    """
+    Blend edit-distance scores with the similarity of the precomputed
+    phonetic keys. The blend can only raise a score, so a spelling that
+    sounds right ("Amoxycilin") gets credit without penalising exact text.
+
+    Keys are short consonant skeletons that unrelated drugs partly share
+    ("Cetirizine" STRSN, "Crocin" KRSN), so only a (near) identical key
+    earns credit, and only for a name that is already close in spelling.
+    """
+    weight = settings.SPELL_CHECK_PHONETIC_WEIGHT
+    if not weight or not len(choice_keys):
+        return scores
+    query_keys = [phonetic_key(query) for query in queries]
+    phonetic = _cdist(query_keys, choice_keys)
+    phonetic[[not key for key in query_keys]] = 0  # Two empty keys are not a match
+    phonetic[phonetic < settings.SPELL_CHECK_PHONETIC_MIN_KEY_SCORE] = 0
+    phonetic[scores < settings.SPELL_CHECK_PHONETIC_MIN_EDIT_SCORE] = 0
+    return np.maximum(scores, (1 - weight) * scores + weight * phonetic)
+
+
+def _score(queries, snapshot):
+    """
+    Score every query against the candidate catalog names in one rapidfuzz
+    cdist call. Returns the score matrix and the catalog position of each
+    of its columns.
+    """
+    positions = _candidate_positions(queries, snapshot)
+    scores = _cdist(queries, [snapshot.names[position] for position in positions])
+    keys = [snapshot.phonetic_keys[position] for position in positions]
+    return _with_phonetics(scores, queries, keys), positions
+
+
+def _score_generic_names(queries, snapshot):
+    """ Score every query against the distinct generic names in one cdist call. """
+    scores = _cdist(queries, snapshot.generic_names)
+    return _with_phonetics(scores, queries, snapshot.generic_phonetic_keys)
+
+
+def _top_columns(row, limit):
+    """ Indexes of the `limit` best scores in `row`, best first, ties in catalog order. """
+    if limit < len(row):
+        candidates = np.argpartition(-row, limit - 1)[:limit]
+    else:
+        candidates = np.arange(len(row))
+    return candidates[np.lexsort((candidates, -row[candidates]))]
+
+
+def correct_medicines(extracted_medicines, snapshot, threshold=50):
+    """
+    Map every extracted medicine to its closest catalog name, or None when
+    nothing scores at least `threshold`.
+
+    All extracted names are scored against the catalog in one rapidfuzz
+    cdist call (spread over SPELL_CHECK_WORKERS threads) instead of one
+    extractOne walk per medicine.
+    """
+    corrected_medicines = dict.fromkeys(extracted_medicines)
+    queries = _unique_queries(extracted_medicines)
+    if not queries or not len(snapshot):
+        return corrected_medicines
+
+    scores, positions = _score(queries, snapshot)
+    if not len(positions):
+        return corrected_medicines
+    best_columns = scores.argmax(axis=1)
+
+    matches = {}
+    for row, query in enumerate(queries):
+        column = best_columns[row]
+        if scores[row, column] >= threshold:
+            matches[query] = snapshot.names[positions[column]]  # Replace incorrect name
+
+    for key, medicine in extracted_medicines.items():
+        if isinstance(medicine, str):
+            corrected_medicines[key] = matches.get(medicine)  # None when no close match found
+    return corrected_medicines
+
+
+def suggest_medicines(extracted_medicines, snapshot, threshold=50, limit=5):
+    """
+    Map every extracted medicine to up to `limit` ranked catalog candidates
+    scoring at least `threshold`, with the details the UI needs to show them.
+    """
+    suggestions = {key: [] for key in extracted_medicines}
+    queries = _unique_queries(extracted_medicines)
+    if not queries or not len(snapshot):
+        return suggestions
+
+    scores, positions = _score(queries, snapshot)
+
+    ranked = {}
+    for row, query in enumerate(queries):
+        candidates = []
+        for column in _top_columns(scores[row], limit):
+            score = scores[row, column]
+            if score < threshold:
+                break
+            entry = snapshot.entries[positions[column]]
+            candidates.append({
+                "id": entry.id,
+                "name": entry.name,
+                "score": round(float(score), 2),
+                "generic_name": entry.generic_name,
+                "medicine_type": entry.medicine_type,
+            })
+        ranked[query] = candidates
+
+    for key, medicine in extracted_medicines.items():
+        if isinstance(medicine, str):
+            suggestions[key] = ranked[medicine]
+    return suggestions
+
+
+def _pick_entry(positions, parsed, snapshot):
+    """
+    Choose between equally scored catalog positions: the prescribed dosage
+    form wins first, then a name carrying the prescribed strength, then
+    catalog order.
+    """
+    def preference(position):
+        entry = snapshot.entries[position]
+        form_matches = parsed.dosage_form is not None and canonical_dosage_form(entry.medicine_type) == parsed.dosage_form
+        strength_matches = parsed.strength is not None and parsed.strength.lower() in entry.name.replace(" ", "").lower()
+        return (not form_matches, not strength_matches, position)
+
+    return snapshot.entries[min(positions, key=preference)]
+
+
+def resolve_medicines(extracted_medicines, snapshot, threshold=50):
+    """
+    Resolve prescription text such as "Tab. Paracetamol 500" to a single
+    MedicineData row.
+
+    The dosage-form prefix and strength suffix are parsed off first. The
+    remaining text is matched against brand names and generic names
+    together, and ties are settled by dosage form (see _pick_entry).
+    """
+    resolved = dict.fromkeys(extracted_medicines)
+    queries = _unique_queries(extracted_medicines)
+    if not queries or not len(snapshot):
+        return resolved
+
+    parsed = [parse_medicine_text(query) for query in queries]
+    brand_scores, positions = _score([medicine.name for medicine in parsed], snapshot)
+    generic_scores = _score_generic_names([medicine.core for medicine in parsed], snapshot)
+
+    matches = {}
+    for row, query in enumerate(queries):
+        brand_best = brand_scores[row].max() if len(positions) else 0
+        generic_best = generic_scores[row].max()
+        best = max(brand_best, generic_best)
+        if best < threshold:
+            continue
+
+        # A brand hit is more specific than a generic one, so it wins a draw
+        if brand_best >= generic_best:
+            matched_on = "name"
+            candidates = [positions[column] for column in np.flatnonzero(np.isclose(brand_scores[row], best))]
+        else:
+            matched_on = "generic_name"
+            candidates = []
+            for column in np.flatnonzero(np.isclose(generic_scores[row], best)):
+                candidates.extend(snapshot.generic_positions[snapshot.generic_names[column]])
+
+        entry = _pick_entry(candidates, parsed[row], snapshot)
+        matches[query] = {
+            "id": entry.id,
+            "name": entry.name,
+            "score": round(float(best), 2),
+            "matched_on": matched_on,
+            "generic_name": entry.generic_name,
+            "medicine_type": entry.medicine_type,
+            "dosage_form": parsed[row].dosage_form,
+            "strength": parsed[row].strength,
+        }
+
+    for key, medicine in extracted_medicines.items():
+        if isinstance(medicine, str):
+            resolved[key] = matches.get(medicine)
+    return resolved
@@ -1,3 +1,94 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from master_data import medicine_index as medicine_index_module
+from master_data.medicine_index import (
+    IndexSnapshot, MedicineEntry, MedicineNameIndex, bump_catalog_version, catalog_version,
+)
+from master_data.models import GenericName, MedicineData, MedicineType
+from master_data.phonetics import phonetic_key
+from master_data.spell_check import correct_medicines, suggest_medicines, resolve_medicines
+
+CATALOG = [
+    ("Amoxicillin", "Amoxicillin"),
+    ("Crocin 500", "Paracetamol"),
+    ("Azithral 500", "Azithromycin"),
+    ("Pantocid 40", "Pantoprazole"),
+]
+
+
+def catalog_snapshot():
+    return IndexSnapshot(
+        MedicineEntry(position, name, position, generic, 1, "Tablet", phonetic_key(name), phonetic_key(generic))
+        for position, (name, generic) in enumerate(CATALOG)
+    )
+
+
+class PhoneticSpellCheckTests(SimpleTestCase):
+    """ Phonetic credit must rescue misspellings without pulling in unrelated drugs. """
+
+    def setUp(self):
+        self.snapshot = catalog_snapshot()
+
+    def test_sound_alike_misspelling_matches(self):
+        self.assertEqual(correct_medicines({"1": "Amoxycilin"}, self.snapshot), {"1": "Amoxicillin"})
+        self.assertEqual(suggest_medicines({"1": "Amoxycilin"}, self.snapshot)["1"][0]["name"], "Amoxicillin")
+        self.assertEqual(resolve_medicines({"1": "Cap. Amoxycilin 500"}, self.snapshot)["1"]["name"], "Amoxicillin")
+
+    def test_unrelated_names_do_not_match(self):
+        self.assertIsNone(correct_medicines({"1": "Cetirizine"}, self.snapshot)["1"])
+        self.assertEqual(suggest_medicines({"1": "Cetirizine"}, self.snapshot)["1"], [])
+        self.assertIsNone(resolve_medicines({"1": "Cetirizine"}, self.snapshot)["1"])
+
+    def test_amoxycilin_is_never_crocin(self):
+        catalog = IndexSnapshot([MedicineEntry(0, "Crocin 500", 0, "Paracetamol", 1, "Tablet",
+                                               phonetic_key("Crocin 500"), phonetic_key("Paracetamol"))])
+        self.assertIsNone(correct_medicines({"1": "Amoxycilin"}, catalog)["1"])
+        self.assertEqual(suggest_medicines({"1": "Amoxycilin"}, catalog)["1"], [])
+        self.assertIsNone(resolve_medicines({"1": "Amoxycilin"}, catalog)["1"])
+
+
+class MedicineNameIndexTests(TestCase):
+    """ Local changes patch the copy row by row, other workers' changes reload it, neither scans to find out. """
+
+    def setUp(self):
+        self.index = MedicineNameIndex()
+        patcher = mock.patch("master_data.signals.medicine_index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tablet = MedicineType.objects.create(name="Tablet")
+        paracetamol = GenericName.objects.create(name="Paracetamol")
+        self.crocin = MedicineData.objects.create(name="Crocin 500", generic_name=paracetamol, medicine_type=tablet)
+        MedicineData.objects.create(name="Dolo 650", generic_name=paracetamol, medicine_type=tablet)
+        catalog_version.expire()
+        self.index.snapshot()
+
+    def test_unchanged_catalog_costs_one_version_lookup(self):
+        catalog_version.expire()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.index.names(), ("Crocin 500", "Dolo 650"))
+
+    def test_local_change_reads_only_the_changed_rows(self):
+        with mock.patch.object(medicine_index_module, "load_entries", wraps=medicine_index_module.load_entries) as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.crocin.name = "Crocin 650"
+                self.crocin.save()
+            self.assertEqual(self.index.names(), ("Crocin 650", "Dolo 650"))
+        load.assert_called_once_with(id=self.crocin.pk)
+
+    def test_related_change_reads_only_its_medicines(self):
+        with mock.patch.object(medicine_index_module, "load_entries", wraps=medicine_index_module.load_entries) as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                generic = self.crocin.generic_name
+                generic.name = "Acetaminophen"
+                generic.save()
+            self.assertEqual({entry.generic_name for entry in self.index.snapshot().entries}, {"Acetaminophen"})
+        load.assert_called_once_with(generic_name_id=generic.pk)
+
+    def test_change_from_another_worker_reloads(self):
+        # A write this process never sees a signal for, only the version it moved
+        MedicineData.objects.filter(pk=self.crocin.pk).update(name="Crocin Advance")
+        bump_catalog_version()
+        catalog_version.expire()
+        self.assertEqual(self.index.names(), ("Crocin Advance", "Dolo 650"))
@@ -1,40 +1,74 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rapidfuzz import process, fuzz
 from django.core.paginator import Paginator
+from bharati_clinic.streaming import ndjson_response
 from .models import MedicineData, GenericName, MedicineType
 from .serializers import MedicineDataSerializer, GenericNameSerializer, MedicineTypeSerializer
 from .filters import MedicineDataFilter, GenericNameFilter, MedicineTypeFilter
+from .medicine_index import medicine_index
+from .autocomplete import autocomplete_index
+from .spell_check import correct_medicines, suggest_medicines, resolve_medicines
+from .spell_cache import spell_check_cache
 
 class SpellCheckMedicine(APIView):
-    def post(self, request):
-        extracted_medicines = request.data  # Get JSON object
-        
-        if not isinstance(extracted_medicines, dict):
-            return Response({"error": "Invalid input format. Expected JSON object."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Fetch all medicine names from the database
-        medicine_list = list(MedicineData.objects.values_list("name", flat=True))
-
-        # Function to correct names
-        def correct_medicines(extracted_medicines, medicine_list, threshold=50):
-            corrected_medicines = {}
-
-            for key, medicine in extracted_medicines.items():
-                best_match, score, _ = process.extractOne(medicine, medicine_list, scorer=fuzz.ratio)
+    # Prescriptions scored per cdist batch when streaming a bulk request
+    stream_chunk_size = 200
 
-                if score >= threshold:
-                    corrected_medicines[key] = best_match  # Replace incorrect name
-                else:
-                    corrected_medicines[key] = None  # No close match found
-
-            return corrected_medicines
+    def post(self, request):
+        extracted_medicines = request.data  # Get JSON object, or a list of them for bulk checks
 
-        # Run correction
-        corrected = correct_medicines(extracted_medicines, medicine_list)
+        bulk = isinstance(extracted_medicines, list)
+        if bulk and not all(isinstance(item, dict) for item in extracted_medicines):
+            return Response({"error": "Invalid input format. Expected a list of JSON objects."}, status=status.HTTP_400_BAD_REQUEST)
+        if not bulk and not isinstance(extracted_medicines, dict):
+            return Response({"error": "Invalid input format. Expected JSON object."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(corrected, status=status.HTTP_200_OK)
+        mode = request.query_params.get("mode", "best")
+        try:
+            threshold = float(request.query_params.get("threshold", 50))
+            limit = int(request.query_params.get("k", 5))
+        except ValueError:
+            return Response({"error": "threshold and k must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "k must be at least 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if mode == "suggest":
+            corrector, params = suggest_medicines, {"threshold": threshold, "limit": limit}
+        elif mode == "resolve":
+            corrector, params = resolve_medicines, {"threshold": threshold}
+        elif mode == "best":
+            corrector, params = correct_medicines, {"threshold": threshold}
+        else:
+            return Response({"error": "Invalid mode. Use 'best', 'suggest' or 'resolve'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Medicine names come from the shared in-memory index, not a table scan.
+        # A bulk request is scored against this one snapshot from start to finish.
+        snapshot = medicine_index.snapshot()
+
+        # Run correction, recurring inputs are answered from the spell-check cache
+        def correct(prescriptions):
+            merged = {
+                (position, key): medicine
+                for position, prescription in enumerate(prescriptions)
+                for key, medicine in prescription.items()
+            }
+            corrected = spell_check_cache.run(corrector, mode, merged, snapshot, **params)
+            results = [{} for _ in prescriptions]
+            for (position, key), value in corrected.items():
+                results[position][key] = value
+            return results
+
+        if not bulk:
+            return Response(correct([extracted_medicines])[0], status=status.HTTP_200_OK)
+
+        if request.query_params.get("stream") == "ndjson":
+            def rows():
+                for start in range(0, len(extracted_medicines), self.stream_chunk_size):
+                    yield from correct(extracted_medicines[start:start + self.stream_chunk_size])
+            return ndjson_response(rows())
+
+        return Response(correct(extracted_medicines), status=status.HTTP_200_OK)
     
 class MedicineAPI(APIView):
     def get(self, request):
@@ -52,6 +86,8 @@ class MedicineAPI(APIView):
                 "getMedicineData":self.getMedicineData,
                 "getMedicineType":self.getMedicineType,
                 "getGenericName":self.getGenericName,
+                "getMedicineAutocomplete":self.getMedicineAutocomplete,
+                "getSpellCheckStats":self.getSpellCheckStats,
             }
             action_status = action_mapper.get(action)
             if action_status:
@@ -86,6 +122,28 @@ class MedicineAPI(APIView):
             self.ctx = {"message": "Error retrieving medicine data!"}
             self.status = status.HTTP_404_NOT_FOUND
 
+    def getMedicineAutocomplete(self, request):
+        """ Prefix completion over medicine and generic names from the in-memory index. """
+        try:
+            prefix = self.data.get("name", "")
+            records_number = int(self.data.get("records_number", 10))
+            if not prefix:
+                self.ctx = {"message": "name is required for autocomplete!"}
+                self.status = status.HTTP_400_BAD_REQUEST
+                return
+
+            data = autocomplete_index.complete(prefix, limit=records_number)
+            self.ctx = {"message": "Successfully retrieved medicine suggestions!", "data": data}
+            self.status = status.HTTP_200_OK
+        except Exception:
+            self.ctx = {"message": "Error retrieving medicine suggestions!"}
+            self.status = status.HTTP_404_NOT_FOUND
+
+    def getSpellCheckStats(self, request):
+        """ Hit/miss counters of this worker's spell-check result cache. """
+        self.ctx = {"message": "Successfully retrieved spell check stats!", "data": spell_check_cache.stats()}
+        self.status = status.HTTP_200_OK
+
     def getGenericName(self, request):
         filterset_class = GenericNameFilter
         try: